@@ -1,25 +1,57 @@
-from selenium import webdriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
-import re
+import json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+from http_client import fetch_page
+from page_parsers import find_dk_games, parse_dk_game
+from browser_pool import get_shared_pool
+from selenium_tables import extract_outer_html
+from scraper_metrics import metrics
+
+
+# (offer category id, subcategory id) of each prop market in the sportsbook's
+# event group feed. These come from the category navigation of the NBA event
+# group (42648) and are the same markets as the url_list pages in scrape_odds.
+feed_categories = {
+    "PRA": (583, 5001),
+    "PR": (583, 9976),
+    "PA": (583, 9973),
+    "P": (1215, 12488),
+    "R": (1216, 12492),
+    "A": (1217, 12495),
+}
 
 
 class DraftKingsScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        mode="browser",
+        feed_url="https://sportsbook.draftkings.com/sites/US-SB/api/v5/eventgroups/42648",
+    ):
+        """mode="browser" renders the props pages in Chrome, mode="feed" reads the
+        sportsbook's JSON event group feed at feed_url directly."""
         self.base_url = "https://sportsbook.draftkings.com/nba-player-props"
-        self.browser = webdriver.Chrome()  # Adjust if you're using a different browser
-        self.wait = WebDriverWait(self.browser, 180)
-
-    def navigate_and_load(self, catagory, subcategory):
+        self.mode = mode
+        self.feed_url = feed_url
+        # A pooled session is only held while scrape_odds runs
+        self.browser = None
+        self.wait = None
+        if mode == "browser":
+            self.pool = get_shared_pool()
+
+    def navigate_and_load(self, catagory, subcategory, browser=None):
+        browser = browser if browser is not None else self.browser
         full_url = f"{self.base_url}?category={catagory}&subcategory={subcategory}"
-        self.browser.get(full_url)
         class_name_to_wait_for = ".sportsbook-event-accordion__wrapper.expanded"
-        self.wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, class_name_to_wait_for))
-        )
+        with metrics.timer("scraper_browser_seconds", page=subcategory):
+            browser.get(full_url)
+            WebDriverWait(browser, 180).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, class_name_to_wait_for)
+                )
+            )
 
     def click_button(self, button_id):
         button = self.wait.until(EC.element_to_be_clickable((By.ID, button_id)))
@@ -29,42 +61,82 @@ class DraftKingsScraper:
             EC.presence_of_element_located((By.CSS_SELECTOR, class_name_to_wait_for))
         )
 
-    def fetch_data(self):
-        updated_html = self.browser.page_source
-        soup = BeautifulSoup(updated_html, "html.parser")
-        return self.find_games(soup)
-
-    def find_games(self, soup):
-        # Implement based on how you identify games in the HTML
-        games = soup.find_all(class_="sportsbook-event-accordion__wrapper expanded")
-        return games
+    def fetch_data(self, browser=None):
+        browser = browser if browser is not None else self.browser
+        # Only the expanded event accordions leave the browser, not the whole page
+        with metrics.timer("scraper_browser_extract_seconds"):
+            html = extract_outer_html(
+                browser, ".sportsbook-event-accordion__wrapper.expanded"
+            )
+        # Parse into plain row dicts straight away so the parsed tree is freed
+        # before the next category loads, instead of holding all six until
+        # create_data_table runs
+        return [self.parse_game_data(game) for game in self.find_games(html)]
+
+    def scrape_category(self, catagory, subcategory):
+        # Runs on a worker thread with its own pooled session
+        with self.pool.session() as browser:
+            self.navigate_and_load(catagory, subcategory, browser)
+            return self.fetch_data(browser)
+
+    def find_games(self, html):
+        return find_dk_games(html)
 
     def parse_game_data(self, game):
         """Extracts and returns the team names, player names, and odds from a game."""
-        data = []
-        team_names_div = game.find(
-            "div", {"aria-label": re.compile(r"^Event Accordion for.*")}
-        )
-        teams = (
-            team_names_div["aria-label"].replace("Event Accordion for ", "")
-            if team_names_div
-            else "Teams not found"
-        )
-
-        rows = game.findAll("tr")
-        for row in rows:
-            data.append(self.parse_row_data(row, teams))
-        return data
+        return parse_dk_game(game)
 
-    def parse_row_data(self, row, teams):
-        """Extracts data from a single row."""
-        player_name = (
-            row.find("span", class_="sportsbook-row-name").text
-            if row.find("span", class_="sportsbook-row-name")
-            else "N/A"
-        )
-        ou_value_over, odds_over, ou_value_under, odds_under = self.extract_odds(row)
+    def create_data_table(self, odds_data):
+        """Creates a DataFrame from the structured odds data."""
+        stat_dict = {}
+        for key, games in odds_data.items():
+            # Both modes hand back parsed rows grouped per event
+            all_data = [row for game in games for row in game]
+            df = pd.DataFrame(all_data)
+            stat_dict[key] = df
+        return stat_dict
 
+    def fetch_feed(self, category_id, subcategory_id):
+        url = f"{self.feed_url}/categories/{category_id}/subcategories/{subcategory_id}?format=json"
+        response = fetch_page(url, use_cache=False)
+        if response.status_code != 200:
+            print(f"Failed to fetch odds feed {url}, response code: {response.status_code}")
+            return None
+        return json.loads(response.content)
+
+    def parse_feed(self, payload, subcategory_id):
+        """Maps the feed's events and offers to the same row dicts the DOM parser
+        produces, grouped per event like the page's accordions."""
+        event_group = payload.get("eventGroup", {})
+        event_names = {
+            event["eventId"]: event.get("name", "Teams not found")
+            for event in event_group.get("events", [])
+        }
+        games = {}
+        for category in event_group.get("offerCategories", []):
+            for descriptor in category.get("offerSubcategoryDescriptors", []):
+                if descriptor.get("subcategoryId") != subcategory_id:
+                    continue
+                offers = descriptor.get("offerSubcategory", {}).get("offers", [])
+                for offer in (offer for group in offers for offer in group):
+                    row = self.parse_feed_offer(
+                        offer, event_names.get(offer.get("eventId"), "Teams not found")
+                    )
+                    games.setdefault(offer.get("eventId"), []).append(row)
+        return list(games.values())
+
+    def parse_feed_offer(self, offer, teams):
+        player_name = "N/A"
+        ou_value_over = odds_over = odds_under = "N/A"
+        for outcome in offer.get("outcomes", []):
+            player_name = outcome.get("participant", player_name)
+            label = outcome.get("label", "")
+            odds = outcome.get("oddsAmerican", "N/A")
+            if label.startswith("O"):
+                ou_value_over = str(outcome["line"]) if "line" in outcome else "N/A"
+                odds_over = odds
+            elif label.startswith("U"):
+                odds_under = odds
         return {
             "Teams": teams,
             "Player Name": player_name,
@@ -73,49 +145,18 @@ class DraftKingsScraper:
             "Odds for Under": odds_under,
         }
 
-    def extract_odds(self, row):
-        """Extracts over/under values and odds from a row."""
-        ou_value_over = ou_value_under = odds_over = odds_under = "N/A"
-        outcomes = row.find_all("div", class_="sportsbook-outcome-cell__body")
-        for outcome in outcomes:
-            label, ou_value, odds = self.parse_outcome(outcome)
-            if label.startswith("O"):
-                ou_value_over, odds_over = ou_value, odds
-            elif label.startswith("U"):
-                ou_value_under, odds_under = ou_value, odds
-        return ou_value_over, odds_over, ou_value_under, odds_under
-
-    def parse_outcome(self, outcome):
-        """Extracts label, over/under value, and odds from an outcome."""
-        label = (
-            outcome.find("span", class_="sportsbook-outcome-cell__label").text
-            if outcome.find("span", class_="sportsbook-outcome-cell__label")
-            else "N/A"
-        )
-        ou_value = (
-            outcome.find("span", class_="sportsbook-outcome-cell__line").text
-            if outcome.find("span", class_="sportsbook-outcome-cell__line")
-            else "N/A"
-        )
-        odds = (
-            outcome.find("span", class_="sportsbook-odds").text
-            if outcome.find("span", class_="sportsbook-odds")
-            else "N/A"
-        )
-        return label, ou_value, odds
-
-    def create_data_table(self, odds_data):
-        """Creates a DataFrame from the structured odds data."""
-        stat_dict = {}
-        for key, games in odds_data.items():
-            all_data = []
-            for game in games:
-                all_data.extend(self.parse_game_data(game))
-            df = pd.DataFrame(all_data)
-            stat_dict[key] = df
-        return stat_dict
+    def scrape_feed(self):
+        data = {}
+        for key, (category_id, subcategory_id) in feed_categories.items():
+            payload = self.fetch_feed(category_id, subcategory_id)
+            data[key] = self.parse_feed(payload, subcategory_id) if payload else []
+        return data
 
-    def scrape_odds(self):
+    def scrape_odds(self, parallel=False, max_sessions=6):
+        """With parallel=True each category loads in its own pooled session at the
+        same time, so the scrape takes about as long as the slowest page."""
+        if self.mode == "feed":
+            return self.scrape_feed()
         url_list = [
             ("player-combos", "pts-%2B-reb-%2B-ast", "PRA"),
             ("player-combos", "pts-%2B-reb", "PR"),
@@ -125,10 +166,26 @@ class DraftKingsScraper:
             ("player-assists", "assists", "A"),
         ]
         data = {}
-        for urls in url_list:
-            self.navigate_and_load(urls[0], urls[1])
-            data[urls[2]] = self.fetch_data()
-        self.browser.close()
+        if parallel:
+            with ThreadPoolExecutor(max_workers=max_sessions) as executor:
+                futures = {
+                    urls[2]: executor.submit(self.scrape_category, urls[0], urls[1])
+                    for urls in url_list
+                }
+                for key, future in futures.items():
+                    data[key] = future.result()
+            return data
+        # The warm session goes back to the pool afterwards instead of being
+        # closed, or is discarded if a page fails, so it never leaks
+        with self.pool.session() as browser:
+            self.browser = browser
+            self.wait = WebDriverWait(browser, 180)
+            try:
+                for urls in url_list:
+                    self.navigate_and_load(urls[0], urls[1])
+                    data[urls[2]] = self.fetch_data()
+            finally:
+                self.browser = self.wait = None
         return data
 
 
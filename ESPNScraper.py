@@ -1,55 +1,127 @@
-import requests
 from bs4 import BeautifulSoup
 from scipy.stats import percentileofscore
 import pandas as pd
-import time
 import re
-from selenium import webdriver
+import threading
+from http_client import fetch_page
+from page_parsers import (
+    parse_league_schedule,
+    parse_schedule_months,
+    parse_team_results,
+)
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-
-options = Options()
-options.add_argument("--ignore-certificate-errors")
+from browser_pool import get_shared_pool
+from defense_table import DefenseTable
+from team_registry import team_id
+from game_log_store import get_shared_store
+from selenium_tables import extract_table
+from scraper_metrics import metrics
 
 
 class EspnScraper:
-    def __init__(self):
+    def __init__(self, bulk_schedule=True, season=2024, store=None):
+        self.season = season
+        self.store = store if store is not None else get_shared_store()
+        # W/L lists and game lists keyed by Basketball Reference code
         self.team_stats_cash = {}
+        self.team_games = {}
         self.team_defensive_stats = {}
         self.position_stats = {}
+        # The same numbers as position_stats, as one array by team id for
+        # feature building. TEAM cells are resolved by team_registry there.
+        self.defense_table = DefenseTable()
+        self.bulk_schedule = bulk_schedule
+        self.league_schedule_loaded = False
+        self.league_schedule_tried = False
+        self.schedule_lock = threading.Lock()
+
+    def fetch_league_schedule(self, season, use_cache=True):
+        """Returns every team's ordered (date, opponent, result) games from the
+        league's monthly schedule pages, about 9 requests instead of one per team,
+        and whether every month was read. The months are the ones the season's
+        schedule page links to, seasons do not all run October to June, e.g.
+        2019-20 went from october-2019 to october-2020."""
+        team_games = {}
+        base_url = "https://www.basketball-reference.com"
+        url = f"{base_url}/leagues/NBA_{season}_games.html"
+        response = fetch_page(url, use_cache=use_cache)
+        if response.status_code != 200:
+            print(
+                f"Failed to fetch the {season} schedule, response code: {response.status_code}"
+            )
+            return team_games, False
+        month_paths = parse_schedule_months(response.content)
+        if not month_paths:
+            print(f"No month pages linked from {url}")
+            return team_games, False
+        complete = True
+        for path in month_paths:
+            month_url = base_url + path
+            response = fetch_page(month_url, use_cache=use_cache)
+            games = (
+                parse_league_schedule(response.content)
+                if response.status_code == 200
+                else []
+            )
+            if not games:
+                # Reported and left incomplete rather than silently short
+                print(
+                    f"No games read from {month_url}, response code: {response.status_code}"
+                )
+                complete = False
+                continue
+            for date, visitor, visitor_pts, home, home_pts in games:
+                if visitor_pts is None or home_pts is None:
+                    continue
+                visitor_won = 1 if visitor_pts > home_pts else 0
+                team_games.setdefault(visitor, []).append((date, home, visitor_won))
+                team_games.setdefault(home, []).append((date, visitor, 1 - visitor_won))
+        return team_games, complete
+
+    def load_league_schedule(self):
+        """Fills every team's W/L list and game list for this season and saves the
+        games to the local store. A schedule with a month missing is not used,
+        records then come from the per team pages and last_game_dates stays
+        empty, so every stored game log is synced."""
+        self.league_schedule_tried = True
+        # Not from the response cache, the last game dates decide which stored
+        # game logs are current and a cached month can be hours old
+        team_games, complete = self.fetch_league_schedule(self.season, use_cache=False)
+        if not complete:
+            print(f"{self.season} schedule is incomplete, using the team pages")
+            return
+        for team, games in team_games.items():
+            self.team_games[team] = games
+            self.team_stats_cash[team] = [result for _, _, result in games]
+            self.store.append_team_games(team, self.season, games)
+        self.league_schedule_loaded = True
+
+    def ensure_league_schedule(self):
+        # Prefetch calls this from several threads, only one loads the schedule.
+        # An incomplete schedule is tried once per run, not once per team.
+        with self.schedule_lock:
+            if not self.league_schedule_tried:
+                self.load_league_schedule()
 
     def find_team_record(self, team):
+        metrics.inc(
+            "scraper_cache_lookups_total",
+            cache="team_record",
+            result="hit" if team in self.team_stats_cash else "miss",
+        )
+        if team not in self.team_stats_cash and self.bulk_schedule:
+            self.ensure_league_schedule()
+        if team not in self.team_stats_cash and team_id(team) is None:
+            # Not a team, e.g. "Free Agent", there is no page to request
+            print(f"Unknown team {team}, no record to look up")
+            return
         if team not in self.team_stats_cash:
-            url = f"https://www.basketball-reference.com/teams/{team}/2024_games.html"
-            time.sleep(7)
-            response = requests.get(url, timeout=10)
+            url = f"https://www.basketball-reference.com/teams/{team}/{self.season}_games.html"
+            response = fetch_page(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                game_rows = soup.findAll("tr")
-                result = [
-                    (
-                        1
-                        if game_row.find("td", {"data-stat": "game_result"})
-                        and game_row.find(
-                            "td", {"data-stat": "game_result"}
-                        ).text.strip()
-                        == "W"
-                        else (
-                            0
-                            if game_row.find("td", {"data-stat": "game_result"})
-                            and game_row.find(
-                                "td", {"data-stat": "game_result"}
-                            ).text.strip()
-                            == "L"
-                            else None
-                        )
-                    )
-                    for game_row in game_rows
-                ]
-
-                result = list(filter(None.__ne__, result))
+                result = parse_team_results(response.content)
                 self.team_stats_cash[team] = result
             else:
                 print(
@@ -59,8 +131,7 @@ class EspnScraper:
     def find_team_defensive_stats(self, team):
         if team not in self.team.defensive_stats:
             url = f"https://www.basketball-reference.com/teams/{team}/2024_games.html"
-            time.sleep(7)
-            response = requests.get(url, timeout=10)
+            response = fetch_page(url)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, "html.parser")
                 table = soup.find("div", {"id": "div_team_and_opponent"})
@@ -104,93 +175,81 @@ class EspnScraper:
             return "/html/body/div[1]/div/div/div[1]/div/main/div[1]/section[2]/div/div[2]/div/ul/li[3]"
 
     def scrape_table_to_dataframe(self, driver, table_xpath):
-
-        table = driver.find_element(By.XPATH, table_xpath)
-        columns = []
-        data = []
-
-        headers = table.find_elements(By.XPATH, ".//thead/tr/th")
-        for header in headers:
-            columns.append(header.text.strip())
-
-        rows = table.find_elements(By.XPATH, ".//tbody/tr")
-        for row in rows:
-            row_data = []
-            cells = row.find_elements(By.XPATH, "./*[self::td or self::th]")
-            for cell in cells:
-                row_data.append(cell.text.strip())
-
-            if any(cell_data for cell_data in row_data):
-                data.append(row_data)
-
+        # One execute_script call for the whole table instead of a WebDriver
+        # call per header, row and cell
+        with metrics.timer("scraper_parse_seconds", page="defense_table"):
+            columns, data = extract_table(driver, table_xpath)
         df = pd.DataFrame(data, columns=columns)
 
         return df
 
     def find_position_opponent_stats(self, position):
+        metrics.inc(
+            "scraper_cache_lookups_total",
+            cache="position_stats",
+            result="hit" if position in self.position_stats else "miss",
+        )
         if position not in self.position_stats:
-            browser = webdriver.Chrome(options=options)
-            browser.get(
-                "https://www.fantasypros.com/daily-fantasy/nba/fanduel-defense-vs-position.php"
-            )
+            with metrics.timer("scraper_browser_seconds", page="defense_vs_position"):
+                with get_shared_pool().session() as browser:
+                    self.scrape_position_tables(browser, position)
 
-            wait = WebDriverWait(browser, 10)
+    def scrape_position_tables(self, browser, position):
+        # Runs in a pooled, already warm session. Loading the page again resets
+        # the period dropdown, so the same session serves every position.
+        browser.get(
+            "https://www.fantasypros.com/daily-fantasy/nba/fanduel-defense-vs-position.php"
+        )
 
-            # xpath = self.return_position_xpath(position)
-            element_xpath = f"//li[@data-pos='{position}']"
-            position_element = wait.until(
-                EC.element_to_be_clickable((By.XPATH, element_xpath))
-            )
-            position_element.click()
+        wait = WebDriverWait(browser, 10)
 
-            table_xpath = "/html/body/div[1]/div[4]/div/div/div/div[6]/table"
-            WebDriverWait(browser, 10).until(
-                EC.visibility_of_element_located((By.XPATH, table_xpath))
-            )
+        # xpath = self.return_position_xpath(position)
+        element_xpath = f"//li[@data-pos='{position}']"
+        position_element = wait.until(
+            EC.element_to_be_clickable((By.XPATH, element_xpath))
+        )
+        position_element.click()
 
-            season_df = self.scrape_table_to_dataframe(browser, table_xpath)
-            season_df["TEAM"] = season_df["TEAM"].str[:3]
-            button_xpath = (
-                "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select"
-            )
-            button = WebDriverWait(browser, 10).until(
-                EC.element_to_be_clickable((By.XPATH, button_xpath))
-            )
-            button.click()
+        table_xpath = "/html/body/div[1]/div[4]/div/div/div/div[6]/table"
+        WebDriverWait(browser, 10).until(
+            EC.visibility_of_element_located((By.XPATH, table_xpath))
+        )
 
-            xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select/option[2]"
-            position_element = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-            position_element.click()
-            WebDriverWait(browser, 10).until(
-                EC.visibility_of_element_located((By.XPATH, table_xpath))
-            )
-            last7df = self.scrape_table_to_dataframe(browser, table_xpath)
-            last7df["TEAM"] = last7df["TEAM"].str[:3]
+        season_df = self.scrape_table_to_dataframe(browser, table_xpath)
+        button_xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select"
+        button = WebDriverWait(browser, 10).until(
+            EC.element_to_be_clickable((By.XPATH, button_xpath))
+        )
+        button.click()
 
-            button_xpath = (
-                "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select"
-            )
-            button = WebDriverWait(browser, 10).until(
-                EC.element_to_be_clickable((By.XPATH, button_xpath))
-            )
-            button.click()
+        xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select/option[2]"
+        position_element = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
+        position_element.click()
+        WebDriverWait(browser, 10).until(
+            EC.visibility_of_element_located((By.XPATH, table_xpath))
+        )
+        last7df = self.scrape_table_to_dataframe(browser, table_xpath)
 
-            xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select/option[3]"
-            position_element = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-            position_element.click()
-            WebDriverWait(browser, 10).until(
-                EC.visibility_of_element_located((By.XPATH, table_xpath))
-            )
-            last15df = self.scrape_table_to_dataframe(browser, table_xpath)
-            last15df["TEAM"] = last15df["TEAM"].str[:3]
+        button_xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select"
+        button = WebDriverWait(browser, 10).until(
+            EC.element_to_be_clickable((By.XPATH, button_xpath))
+        )
+        button.click()
 
-            self.position_stats[position] = {
-                "Season": season_df,
-                "Last7": last7df,
-                "Last15": last15df,
-            }
+        xpath = "/html/body/div[1]/div[4]/div/nav/nav/div[2]/div[2]/div/select/option[3]"
+        position_element = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
+        position_element.click()
+        WebDriverWait(browser, 10).until(
+            EC.visibility_of_element_located((By.XPATH, table_xpath))
+        )
+        last15df = self.scrape_table_to_dataframe(browser, table_xpath)
 
-            browser.quit()
+        self.position_stats[position] = {
+            "Season": season_df,
+            "Last7": last7df,
+            "Last15": last15df,
+        }
+        self.defense_table.add_position(position, self.position_stats[position])
 
     def write_excel(self):
         path = "Dataframes/TeamStats.xlsx"
@@ -205,6 +264,12 @@ class EspnScraper:
     def return_cache_value(self, team):
         return self.team_stats_cash[team]
 
+    def return_team_games(self, team):
+        return self.team_games.get(team, [])
+
+    def last_game_dates(self):
+        return {team: games[-1][0] for team, games in self.team_games.items() if games}
+
 
 # scraper = EspnScraper()
 # scraper.find_position_opponent_stats("SG")
@@ -1,3 +1,4 @@
+import datetime
 import pandas as pd
 from bs4 import BeautifulSoup
 import requests
@@ -7,9 +8,15 @@ import tqdm
 
 
 class BasketballStatsProcessor:
-    def __init__(self, data_frames):
-        self.scraper = PlayerStatsScraper()
+    def __init__(self, data_frames, scraper=None, game_date=None):
+        # Pass in the scraper used for today's features so each game log is
+        # only downloaded once per daily cycle
+        self.scraper = scraper if scraper is not None else PlayerStatsScraper()
         self.data_frames = data_frames
+        # Date the graded props were for, yesterday's slate unless given
+        if game_date is None:
+            game_date = datetime.date.today() - datetime.timedelta(days=1)
+        self.game_date = str(game_date)
         self.stat_types = {
             "PRA": ["PTS", "REB", "AST"],
             "PR": ["PTS", "REB"],
@@ -20,7 +27,7 @@ class BasketballStatsProcessor:
         }
 
     def get_most_recent_game_stats(self, player_name):
-        self.scraper.get_most_recent_game_stats(player_name)
+        self.scraper.get_most_recent_game_stats(player_name, self.game_date)
         return self.scraper.return_last_night_cache(player_name)
 
     def update_data_frames(self):
@@ -1,9 +1,13 @@
-import requests
 from bs4 import BeautifulSoup
 from scipy.stats import percentileofscore
 import pandas as pd
-import time
 import re
+from http_client import fetch_page
+from game_log import GameLog, GameRow
+from game_log_store import get_shared_store
+from page_parsers import parse_game_log_page
+from scraper_metrics import metrics
+from player_index import get_shared_index, gamelog_url, player_id_from_url
 
 position_mapping = {
     "Shooting Guard": "SG",
@@ -16,13 +20,41 @@ position_mapping = {
 
 
 class PlayerStatsScraper:
-    def __init__(self):
+    def __init__(self, store=None, season=2024):
         self.player_stats_cache = {}
         self.player_last_night_cache = {}
+        self.game_logs = {}
+        self.player_index = get_shared_index()
+        self.store = store if store is not None else get_shared_store()
+        self.season = season
+        # Date of each team's latest played game by Basketball Reference code,
+        # filled in from the league schedule. Players whose team has not played
+        # since their last sync are read from the store without downloading
+        # their game log.
+        self.team_last_game = {}
 
     def generate_player_url(self, player_name):
+        player_id = self.resolve_player_id(player_name)
+        return gamelog_url(player_id, self.season) if player_id else None
+
+    def resolve_player_id(self, player_name):
+        """basketball-reference player id for a DraftKings name, from the player
+        index or else a search, or None."""
+        # Names that could not be resolved are not requested again until the
+        # negative entry expires, so each costs at most one request a day
+        if self.player_index.recently_failed(player_name):
+            metrics.inc("scraper_cache_lookups_total", cache="player_failures")
+            return None
+        player_id = self.player_index.lookup(player_name)
+        metrics.inc(
+            "scraper_cache_lookups_total",
+            cache="player_index",
+            result="hit" if player_id else "miss",
+        )
+        if player_id:
+            return player_id
         search_url = f"https://www.basketball-reference.com/search/search.fcgi?search={player_name.replace(' ', '+')}"
-        response = requests.get(search_url)
+        response = fetch_page(search_url)
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, "html.parser")
             players_div = soup.find("div", id="players")
@@ -32,13 +64,26 @@ class PlayerStatsScraper:
                 else None
             )
             if player_url_div:
-                player_page_url = f"https://www.basketball-reference.com{player_url_div.text[:-5]}/gamelog/2024"
-                return player_page_url
+                player_page_url = f"https://www.basketball-reference.com{player_url_div.text[:-5]}/gamelog/{self.season}"
             else:
-                emergency_url = (
-                    soup.find("link", rel="canonical")["href"][:-5] + "/gamelog/2024"
+                # A search that lands straight on a player page has that page as
+                # its canonical link. Anything else is a results page with no
+                # player match, not a URL to build a game log from.
+                canonical = soup.find("link", rel="canonical")
+                href = canonical["href"] if canonical else ""
+                player_page_url = (
+                    href[:-5] + f"/gamelog/{self.season}"
+                    if "/players/" in href
+                    else None
                 )
-                return emergency_url
+            # Remember the answer so tomorrow's lookup for this name stays offline
+            player_id = player_id_from_url(player_page_url) if player_page_url else None
+            if not player_id:
+                print(f"No Basketball Reference player found for {player_name}")
+                self.player_index.record_failure(player_name)
+                return None
+            self.player_index.add(player_name, player_id)
+            return player_id
         else:
             print("Failed to make a request to Basketball Reference.")
             return None
@@ -72,91 +117,106 @@ class PlayerStatsScraper:
 
         return float_value
 
-    def fetch_player_stats(self, player_name):
-        if player_name not in self.player_stats_cache:
-            url = self.generate_player_url(player_name)
-            time.sleep(7)
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                game_rows = soup.findAll(
-                    "tr", {"id": lambda x: x and x.startswith("pgl_basic")}
-                )
-                game_stats = []
-                minutes_played = []
-
-                for row in game_rows:
-                    # Extracting game statistics
-                    points = int(row.find("td", {"data-stat": "pts"}).text or 0)
-                    rebounds = int(row.find("td", {"data-stat": "trb"}).text or 0)
-                    assists = int(row.find("td", {"data-stat": "ast"}).text or 0)
-                    game_stats.append((points, rebounds, assists))
-                    # Extracting minutes played
-                    minutes = row.find("td", {"data-stat": "mp"}).text.strip() or "0"
-                    float_minutes = self.convert_time_to_float(minutes)
-
-                    minutes_played.append(float_minutes)
-                minutes_played = [num for num in minutes_played if num != 0]
-                player_team = (
-                    soup.findAll("td", {"data-stat": "team_id"})[-1].text
-                    if soup.findAll("td", {"data-stat": "team_id"})
-                    else "Free Agent"
-                )
-                position_strong_tag = soup.find(
-                    "strong", text=lambda t: t and "Position:" in t
-                )
-
-                # If the <strong> tag is found, get its following sibling
-                position_text = (
-                    position_strong_tag.next_sibling.strip()
-                    if position_strong_tag
-                    else "Unknown"
+    def parse_game_log(self, player_name, content):
+        rows, player_team, position_text = parse_game_log_page(content)
+        dates = [row.get("date_game", "").strip() for row in rows]
+        listed_through = max((date for date in dates if date), default=None)
+        games = []
+        for row in rows:
+            # Rows for games the player sat out have no box score cells
+            if "pts" not in row:
+                continue
+            minutes = row.get("mp", "").strip() or "0"
+            float_minutes = (
+                self.convert_time_to_float(minutes) if ":" in minutes else float(minutes)
+            )
+            games.append(
+                GameRow(
+                    row.get("date_game", "").strip(),
+                    row.get("team_id", "").strip(),
+                    row.get("opp_id", "").strip(),
+                    int(row["pts"] or 0),
+                    int(row["trb"] or 0),
+                    int(row["ast"] or 0),
+                    float_minutes,
                 )
-                # print(position_text)
-                # Clean up the position text to get just the primary position
-
-                # First, replace 'and' with a comma for uniformity if it exists
-                position_text = position_text.replace(" and", ",")
-
-                # Now split by comma and strip spaces to get the list of positions
-                position_text = position_text.replace(" and", ",")
-
-                # Then we split by comma, take the first element, and strip any excess whitespace or symbols
-                primary_position = position_text.split(",")[0].split("\n")[0].strip()
+            )
+        # Replace 'and' with a comma for uniformity if it exists
+        position_text = position_text.replace(" and", ",")
+
+        # Then we split by comma, take the first element, and strip any excess whitespace or symbols
+        primary_position = position_text.split(",")[0].split("\n")[0].strip()
+        player_position = position_mapping.get(primary_position, "Unknown")
+        return GameLog(player_name, player_team, player_position, games, listed_through)
+
+    def sync_game_log(self, player_name, player_id):
+        """Downloads the player's game log and appends the games newer than the
+        store's high water mark. The store already decided the log is out of
+        date, so the page is not read from the response cache, which could hand
+        back the same log from hours earlier."""
+        url = gamelog_url(player_id, self.season)
+        response = fetch_page(url, use_cache=False)
+        if response.status_code == 200:
+            game_log = self.parse_game_log(player_name, response.content)
+            self.store.append(game_log, self.season, player_id)
+        elif response.status_code == 404:
+            # Not requested again today, rather than once for every sheet
+            print(f"No game log for {player_name} at {url}")
+            self.player_index.record_failure(player_name)
+        else:
+            print(f"Failed to fetch data for {player_name}")
+
+    def fetch_game_log(self, player_name):
+        """Loads a player's game log once per run from the local store, syncing new
+        games first when needed. Both the season stats and last night's stats are
+        read from the same GameLog."""
+        metrics.inc(
+            "scraper_cache_lookups_total",
+            cache="game_log_memory",
+            result="hit" if player_name in self.game_logs else "miss",
+        )
+        if player_name not in self.game_logs:
+            player_id = self.resolve_player_id(player_name)
+            if player_id is None:
+                print(f"Failed to fetch data for {player_name}")
+                self.game_logs[player_name] = None
+                return None
+            needs_sync = self.store.needs_sync(
+                player_id, self.season, self.team_last_game
+            )
+            metrics.inc(
+                "scraper_cache_lookups_total",
+                cache="game_log_store",
+                result="miss" if needs_sync else "hit",
+            )
+            if needs_sync:
+                self.sync_game_log(player_name, player_id)
+            self.game_logs[player_name] = self.store.load(
+                player_id, self.season, player_name
+            )
+        return self.game_logs[player_name]
 
-                # print(primary_position)
-                # If position_text contains multiple positions, split and get the first one, otherwise, it's already the primary position
-                # primary_position = position_text.split(",")[0].strip()
-                player_position = position_mapping.get(primary_position, "Unknown")
+    def fetch_player_stats(self, player_name):
+        if player_name not in self.player_stats_cache:
+            game_log = self.fetch_game_log(player_name)
+            if game_log is not None:
                 self.player_stats_cache[player_name] = [
-                    game_stats,
-                    player_team,
-                    player_position,
-                    minutes_played,
+                    game_log.game_stats(),
+                    game_log.team,
+                    game_log.position,
+                    game_log.minutes_played(),
                 ]
             else:
-                print(f"Failed to fetch data for {player_name}")
                 self.player_stats_cache[player_name] = []
 
-    def get_most_recent_game_stats(self, player_name):
+    def get_most_recent_game_stats(self, player_name, game_date):
+        """Caches the player's stats from the game on game_date, or None when
+        the player did not play that day, so the row is left ungraded."""
         if player_name not in self.player_last_night_cache:
-            url = self.generate_player_url(player_name)
-            time.sleep(7)
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                game_log_table = soup.find("table", id="pgl_basic")
-                last_game_row = game_log_table.find_all(
-                    "tr", class_=lambda x: x != "thead"
-                )[-1]
-                points = last_game_row.find("td", {"data-stat": "pts"}).text
-                rebounds = last_game_row.find("td", {"data-stat": "trb"}).text
-                assists = last_game_row.find("td", {"data-stat": "ast"}).text
-                self.player_last_night_cache[player_name] = [
-                    float(points),
-                    float(rebounds),
-                    float(assists),
-                ]
+            game_log = self.fetch_game_log(player_name)
+            self.player_last_night_cache[player_name] = (
+                game_log.stats_on(game_date) if game_log is not None else None
+            )
 
     def return_last_night_cache(self, player):
         return self.player_last_night_cache[player]
@@ -6,8 +6,14 @@ from model import StatTypeModel
 from emailpicks import main as sendpicks
 from sendemail import send_email_with_attachment
 from neuralnet import StatTypeNNModel
+from NBAReferenceScraper import PlayerStatsScraper
+from scraper_metrics import metrics
+from http_session import connection_reuse
 
 model = StatTypeNNModel()
+# Shared between grading yesterday's props and building today's features, both
+# read the same game logs
+stats_scraper = PlayerStatsScraper()
 
 
 def fetch_daily_data():
@@ -24,7 +30,7 @@ def process_data(odds_df):
     """
     Process scraped data into a structured format for analysis.
     """
-    PPA = PlayerPerformanceAnalyzer(odds_df)
+    PPA = PlayerPerformanceAnalyzer(odds_df, stats_scraper)
     # PPA.write_dataframe(odds_df, "Dataframes/DKFrame.xlsx")
     # PPA.write_dataframe()
     PPA.fetch_player_yearly_data()
@@ -69,7 +75,7 @@ def save_predictions(predictions):
 
 
 def update_data(dict_to_add):
-    updater = BasketballStatsProcessor(dict_to_add)
+    updater = BasketballStatsProcessor(dict_to_add, stats_scraper)
     updater.update_data_frames()
 
 
@@ -102,6 +108,13 @@ def main():
     # just_predictions(todaysdata)
 
     send_email_with_attachment()
+    # Where the run spent its time: request latency, rate limit sleeps, parse
+    # times, browser waits and cache hit rates
+    metrics.write_reports("DataFrames/run_metrics")
+    for host, (requests_made, opened, reuse) in connection_reuse().items():
+        print(
+            f"{host}: {requests_made} requests, {opened} connections, {reuse:.0%} reused"
+        )
 
     #
 
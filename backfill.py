@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from ESPNScraper import EspnScraper
+from NBAReferenceScraper import PlayerStatsScraper
+from game_log_store import get_shared_store
+from http_client import fetch_page
+from page_parsers import parse_player_listing
+from player_index import gamelog_url
+
+# Fills the local game log store with many seasons of player game logs and team
+# schedules. Every finished page is recorded in a checkpoint file, so an
+# interrupted run picks up where it stopped. Downloads go through the shared
+# rate limiter, the worker threads only overlap network waits with parsing.
+# Backfilled pages skip the response cache, they would only evict the pages the
+# daily run needs and the store keeps the parsed games anyway.
+
+# Checkpoints written before version 2 could mark a season's schedule done with
+# months missing, and covered store rows that were keyed by name, so they are
+# started over
+checkpoint_version = 2
+
+
+class Checkpoint:
+    def __init__(self, path, save_every=20):
+        self.path = path
+        self.save_every = save_every
+        self.lock = threading.RLock()
+        self.completed = set()
+        self.unsaved = 0
+        if os.path.exists(path):
+            with open(path) as file:
+                saved = json.load(file)
+            if isinstance(saved, dict) and saved.get("version") == checkpoint_version:
+                self.completed = set(saved["completed"])
+            else:
+                print(f"Starting over, {path} is from an older backfill")
+
+    def done(self, key):
+        return key in self.completed
+
+    def mark(self, key):
+        with self.lock:
+            self.completed.add(key)
+            self.unsaved += 1
+            if self.unsaved >= self.save_every:
+                self.save()
+
+    def save(self):
+        # Written to a temporary file first so a kill mid write cannot corrupt it
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".tmp", "w") as file:
+                json.dump(
+                    {
+                        "version": checkpoint_version,
+                        "completed": sorted(self.completed),
+                    },
+                    file,
+                )
+            os.replace(self.path + ".tmp", self.path)
+            self.unsaved = 0
+
+
+class Backfill:
+    def __init__(
+        self, seasons, checkpoint_path="Data/backfill_checkpoint.json", max_workers=4
+    ):
+        self.seasons = seasons
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.max_workers = max_workers
+        self.store = get_shared_store()
+
+    def season_players(self, season):
+        url = f"https://www.basketball-reference.com/leagues/NBA_{season}_per_game.html"
+        response = fetch_page(url, use_cache=False)
+        if response.status_code != 200:
+            print(
+                f"Failed to fetch {season} player listing, response code: {response.status_code}"
+            )
+            return []
+        # Traded players are listed once per team, keep one entry per player
+        players = {}
+        for name, player_id in parse_player_listing(response.content):
+            players.setdefault(player_id, name)
+        return [(name, player_id) for player_id, name in players.items()]
+
+    def backfill_schedule(self, season):
+        key = f"schedule:{season}"
+        if self.checkpoint.done(key):
+            return
+        team_scraper = EspnScraper(season=season, store=self.store)
+        team_games, complete = team_scraper.fetch_league_schedule(
+            season, use_cache=False
+        )
+        for team, games in team_games.items():
+            self.store.append_team_games(team, season, games)
+        if complete:
+            self.checkpoint.mark(key)
+        else:
+            print(f"{season} schedule is incomplete, it is fetched again next run")
+
+    def backfill_player(self, scraper, season, player_name, player_id):
+        key = f"player:{season}:{player_id}"
+        if self.checkpoint.done(key):
+            return
+        response = fetch_page(gamelog_url(player_id, season), use_cache=False)
+        if response.status_code != 200:
+            print(
+                f"Failed to fetch {player_name} {season}, response code: {response.status_code}"
+            )
+            return
+        game_log = scraper.parse_game_log(player_name, response.content)
+        self.store.append(game_log, season, player_id)
+        self.checkpoint.mark(key)
+
+    def run(self):
+        try:
+            for season in self.seasons:
+                self.backfill_schedule(season)
+                scraper = PlayerStatsScraper(store=self.store, season=season)
+                players = [
+                    (name, player_id)
+                    for name, player_id in self.season_players(season)
+                    if not self.checkpoint.done(f"player:{season}:{player_id}")
+                ]
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    jobs = [
+                        executor.submit(
+                            self.backfill_player, scraper, season, name, player_id
+                        )
+                        for name, player_id in players
+                    ]
+                    completed = as_completed(jobs)
+                    for job in tqdm(completed, total=len(jobs), desc=str(season)):
+                        try:
+                            job.result()
+                        except Exception as e:
+                            print(f"Backfill error: {e}")
+        finally:
+            self.checkpoint.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill player and team history.")
+    parser.add_argument(
+        "--start", type=int, required=True, help="first season, e.g. 2015"
+    )
+    parser.add_argument("--end", type=int, default=2024, help="last season, inclusive")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--checkpoint", default="Data/backfill_checkpoint.json")
+    args = parser.parse_args()
+    Backfill(
+        list(range(args.start, args.end + 1)), args.checkpoint, args.workers
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import atexit
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+# Sites like DraftKings serve a stripped page to the default headless user agent
+user_agent = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+)
+
+
+def chrome_options(headless=True):
+    options = Options()
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument(f"--user-agent={user_agent}")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    if headless:
+        options.add_argument("--headless=new")
+    return options
+
+
+class BrowserPool:
+    """Keeps warm Chrome sessions around so scrapers reuse them instead of paying
+    a browser cold start for every page or position."""
+
+    def __init__(self, max_sessions=6, headless=True):
+        self.max_sessions = max_sessions
+        self.headless = headless
+        self.idle = []
+        self.sessions = []
+        self.lock = threading.Lock()
+        self.available = threading.Semaphore(max_sessions)
+
+    def acquire(self):
+        self.available.acquire()
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        try:
+            browser = webdriver.Chrome(options=chrome_options(self.headless))
+        except Exception:
+            self.available.release()
+            raise
+        with self.lock:
+            self.sessions.append(browser)
+        return browser
+
+    def release(self, browser):
+        with self.lock:
+            self.idle.append(browser)
+        self.available.release()
+
+    def discard(self, browser):
+        # For sessions left in a bad state, e.g. after a crashed tab
+        with self.lock:
+            if browser in self.sessions:
+                self.sessions.remove(browser)
+        try:
+            browser.quit()
+        finally:
+            self.available.release()
+
+    @contextmanager
+    def session(self):
+        browser = self.acquire()
+        try:
+            yield browser
+        except Exception:
+            self.discard(browser)
+            raise
+        else:
+            self.release(browser)
+
+    def shutdown(self):
+        with self.lock:
+            sessions, self.sessions, self.idle = self.sessions, [], []
+        for browser in sessions:
+            try:
+                browser.quit()
+            except Exception:
+                pass
+
+
+shared_pool = None
+shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool():
+    global shared_pool
+    with shared_pool_lock:
+        if shared_pool is None:
+            shared_pool = BrowserPool()
+            atexit.register(shared_pool.shutdown)
+    return shared_pool
@@ -7,50 +7,26 @@ from tqdm import tqdm
 from tqdm.auto import tqdm
 import traceback
 import statistics as st
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from ESPNScraper import EspnScraper
+from feature_engine import FeatureEngine
+from defense_table import stats as defense_stats
+from team_registry import game_team_ids, team_code, team_id
 
 tqdm.pandas()
 
-crossovers = {"UTA": "UTH", "CHO": "CHA", "BKN": "BKR", "NOR": "NOP"}
-nba_teams = {
-    "ATL Hawks": "ATL",
-    "BOS Celtics": "BOS",
-    "BKN Nets": "BRK",
-    "CHA Hornets": "CHO",
-    "CHI Bulls": "CHI",
-    "CLE Cavaliers": "CLE",
-    "DAL Mavericks": "DAL",
-    "DEN Nuggets": "DEN",
-    "DET Pistons": "DET",
-    "GS Warriors": "GSW",
-    "HOU Rockets": "HOU",
-    "IND Pacers": "IND",
-    "LA Clippers": "LAC",
-    "LA Lakers": "LAL",
-    "MEM Grizzlies": "MEM",
-    "MIA Heat": "MIA",
-    "MIL Bucks": "MIL",
-    "MIN Timberwolves": "MIN",
-    "NO Pelicans": "NOP",
-    "NY Knicks": "NYK",
-    "OKC Thunder": "OKC",
-    "ORL Magic": "ORL",
-    "PHI 76ers": "PHI",
-    "PHO Suns": "PHO",
-    "POR Trail Blazers": "POR",
-    "SAC Kings": "SAC",
-    "SA Spurs": "SAS",
-    "TOR Raptors": "TOR",
-    "UTA Jazz": "UTA",
-    "WAS Wizards": "WAS",
-}
-
 
 class PlayerPerformanceAnalyzer:
-    def __init__(self, dataframe):
-        self.stats_Scraper = PlayerStatsScraper()
+    def __init__(self, dataframe, stats_scraper=None, extra_windows=()):
+        self.stats_Scraper = (
+            stats_scraper if stats_scraper is not None else PlayerStatsScraper()
+        )
         self.team_Scraper = EspnScraper()
         self.df = dataframe
+        self.feature_engine = None
+        # Last N windows to add feature columns for besides season, 10 and 5
+        self.extra_windows = extra_windows
         # Additional attributes for storing team records, defensive ratings, etc.
 
     def fetch_player_yearly_data(self):
@@ -95,15 +71,11 @@ class PlayerPerformanceAnalyzer:
         return relevant_stats
 
     def get_opposing_team_code(self, game_row, team):
-        # Split the game row into home team and away team
-        home_team, away_team = game_row.split(" @ ")
-        # Look up team codes
-        home_team_code = nba_teams.get(home_team.strip(), "Team not found")
-        away_team_code = nba_teams.get(away_team.strip(), "Team not found")
-        if home_team_code == team:
-            return away_team_code
-        else:
-            return home_team_code
+        # Both sides of "Home @ Away" resolved through the team registry
+        home_id, away_id = game_team_ids(game_row)
+        known = home_id is not None and home_id == team_id(team)
+        opponent_id = away_id if known else home_id
+        return team_code(opponent_id) or "Team not found"
 
     def calculate_win_percentage(self, result_list):
         return sum(result_list) / len(result_list)
@@ -112,12 +84,6 @@ class PlayerPerformanceAnalyzer:
         return st.mean(sum(stats) for stats in game_stats)
 
     def calculate_opponents(self, pos, stat_type, team):
-        if team in crossovers:
-
-            scared = crossovers[team]
-            team = scared
-        return_list = {}
-
         # Define which columns to sum based on the stat_type
         stats_columns = {
             "P": ["PTS"],
@@ -132,29 +98,17 @@ class PlayerPerformanceAnalyzer:
             return {"Season": 0, "Last7": 0, "Last15": 0}
 
         self.team_Scraper.find_position_opponent_stats(pos)
-        data_dict = self.team_Scraper.return_defensive_cache(pos)
-        for period, df in data_dict.items():
-            # Convert the columns to numeric, errors='coerce' will set non-convertible values to NaN
-            for stat in stats_to_sum:
-                df[stat] = pd.to_numeric(df[stat], errors="coerce")
-
-            # Find the row for the specified team
-            team_row = df[df["TEAM"].str.contains(team, case=False, regex=False)]
-
-            # If the team is not found, continue to the next period
-            if team_row.empty:
-                continue
-
-            # Sum the specified stats for the team
-            stats_sum = team_row[stats_to_sum].sum(axis=1).iloc[0]
-
-            # Add the sum to the return_list under the period key
-            return_list[period] = stats_sum
-
-        return return_list
+        # Summed stats for each period the team appears in, read from the table
+        # built when the position was scraped
+        return self.team_Scraper.defense_table.lookup(
+            team_id(team),
+            pos,
+            [defense_stats.index(stat) for stat in stats_to_sum],
+        )
 
     def add_new_columns(self, row, stat_type):
-        # Assuming stats_scraper is an instance of a class that has the necessary methods
+        # Row by row reference for FeatureEngine.add_features, which has to give
+        # the same numbers. tests/test_feature_engine.py compares the two.
         try:
             player_name = row["Player Name"]
             if player_name == "N/A":
@@ -163,6 +117,8 @@ class PlayerPerformanceAnalyzer:
             ou_value = float(row["O/U"])
             self.stats_Scraper.fetch_player_stats(player_name)
             player_stats = self.stats_Scraper.return_Cache_value(player_name)
+            if not player_stats:
+                return row  # Players that could not be found keep the row as is
             game_stats, player_team, player_position, minute_stats = (
                 player_stats[0],
                 player_stats[1],
@@ -237,13 +193,84 @@ class PlayerPerformanceAnalyzer:
             print(Exception, e)
             return row
 
+    def collect_players(self):
+        players = set()
+        for df in self.df.values():
+            players.update(name for name in df["Player Name"] if name != "N/A")
+        return sorted(players)
+
+    def collect_teams(self):
+        teams = set()
+        for player_name in self.collect_players():
+            player_stats = self.stats_Scraper.player_stats_cache.get(player_name)
+            if player_stats and player_stats[1] != "Free Agent":
+                teams.add(player_stats[1])
+        for df in self.df.values():
+            for game in df["Teams"].dropna().unique():
+                teams.update(
+                    team_code(side) for side in game_team_ids(game) if side is not None
+                )
+        return sorted(teams)
+
+    async def prefetch_async(self, max_workers=4):
+        # The scrapers are blocking, so they run on a small thread pool. The shared
+        # rate limiter keeps the request rate legal, this just overlaps the
+        # network waits and parsing of different pages.
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            if self.team_Scraper.bulk_schedule:
+                # The schedule tells the player scraper which stored game logs
+                # are already current, so load it before the players
+                await loop.run_in_executor(
+                    executor, self.team_Scraper.ensure_league_schedule
+                )
+                self.stats_Scraper.team_last_game = (
+                    self.team_Scraper.last_game_dates()
+                )
+
+            async def run_all(fn, keys, desc):
+                jobs = [loop.run_in_executor(executor, fn, key) for key in keys]
+                results = []
+                completed = asyncio.as_completed(jobs)
+                for job in tqdm(completed, total=len(jobs), desc=desc):
+                    try:
+                        results.append(await job)
+                    except Exception as e:
+                        print(f"Prefetch error: {e}")
+                return results
+
+            await run_all(
+                self.stats_Scraper.fetch_player_stats,
+                self.collect_players(),
+                "Prefetching players",
+            )
+            await run_all(
+                self.team_Scraper.find_team_record,
+                self.collect_teams(),
+                "Prefetching teams",
+            )
+
+    def prefetch(self, max_workers=4):
+        """Downloads every player and team page needed by the six sheets up front,
+        so the row by row enrichment only reads from memory."""
+        asyncio.run(self.prefetch_async(max_workers))
+
     def enrich_with_coverage(self):
+        self.prefetch()
+        # Same columns as applying add_new_columns to every row, computed a
+        # sheet at a time from the slate's player and team summaries
+        engine = self.slate_features()
         for stat_type, df in self.df.items():
             print(f"Processing {stat_type}.")
-            # Apply the function to all rows in the DataFrame
-            self.df[stat_type] = df.progress_apply(
-                lambda row: self.add_new_columns(row, stat_type), axis=1
+            self.df[stat_type] = engine.add_features(df, stat_type)
+
+    def slate_features(self):
+        """The slate's FeatureEngine, loaded once and shared by all six sheets."""
+        if self.feature_engine is None:
+            self.feature_engine = FeatureEngine(self, self.extra_windows).load(
+                self.df
             )
+        return self.feature_engine
 
     def calculate_coverage(self, ou, game_stats, multiple):
 
@@ -0,0 +1,77 @@
+import threading
+import numpy as np
+import pandas as pd
+from team_registry import fantasypros_team_id, team_codes
+
+# FantasyPros defense vs position numbers as one dense array, indexed by
+# (team id, position, period, stat) with ids from team_registry. Filled once
+# when a position's tables are scraped, so feature building reads it with an
+# array index instead of converting and searching the DataFrames on every row.
+
+positions = ["PG", "SG", "SF", "PF", "C"]
+periods = ["Season", "Last7", "Last15"]
+stats = ["PTS", "REB", "AST"]
+
+
+class DefenseTable:
+    def __init__(self):
+        shape = (len(team_codes), len(positions), len(periods))
+        self.values = np.full(shape + (len(stats),), np.nan)
+        # Whether the team had a row in that position's period table
+        self.present = np.zeros(shape, dtype=bool)
+        self.lock = threading.Lock()
+
+    def add_position(self, position, frames):
+        """Stores a position's {period: DataFrame} tables. Stat cells that are
+        not numbers are kept as NaN and count as 0 in sums, the way
+        pd.to_numeric(errors="coerce") and DataFrame.sum did."""
+        if position not in positions:
+            return
+        column = positions.index(position)
+        with self.lock:
+            for period, df in frames.items():
+                if period not in periods:
+                    continue
+                numbers = np.column_stack(
+                    [
+                        pd.to_numeric(df[stat], errors="coerce").to_numpy(dtype=float)
+                        for stat in stats
+                    ]
+                )
+                cell = periods.index(period)
+                for team, row in zip(df["TEAM"], numbers):
+                    row_team = fantasypros_team_id(team)
+                    # The first row for a team wins, as with .iloc[0] before
+                    if row_team is None:
+                        continue
+                    if not self.present[row_team, column, cell]:
+                        self.values[row_team, column, cell] = row
+                        self.present[row_team, column, cell] = True
+
+    def lookup(self, team, position, stat_indexes):
+        """{period: summed stats} for the periods team (an id, None when it is
+        unknown) appears in, the same dict calculate_opponents built from the
+        DataFrames."""
+        if team is None or position not in positions:
+            return {}
+        column = positions.index(position)
+        sums = np.nansum(self.values[team, column][:, stat_indexes], axis=1)
+        return {
+            period: sums[index]
+            for index, period in enumerate(periods)
+            if self.present[team, column, index]
+        }
+
+    def gather(self, team_ids, position_ids, stat_indexes):
+        """(rows, periods) summed stats for arrays of team and position ids, NaN
+        where the team is missing from a period's table or an id is -1."""
+        team_ids = np.asarray(team_ids, dtype=int)
+        position_ids = np.asarray(position_ids, dtype=int)
+        result = np.full((len(team_ids), len(periods)), np.nan)
+        known = (team_ids >= 0) & (position_ids >= 0)
+        if known.any():
+            cells = self.values[team_ids[known], position_ids[known]]
+            sums = np.nansum(cells[:, :, stat_indexes], axis=2)
+            present = self.present[team_ids[known], position_ids[known]]
+            result[known] = np.where(present, sums, np.nan)
+        return result
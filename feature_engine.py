@@ -0,0 +1,382 @@
+import statistics as st
+import numpy as np
+import pandas as pd
+from defense_table import periods as defense_periods
+from defense_table import positions as defense_positions
+from team_registry import game_team_ids, team_code, team_codes, team_id
+from window_index import WindowIndex, right_aligned
+
+# Columnar version of PlayerPerformanceAnalyzer.add_new_columns. Every player's
+# season is held as one row of a (players x games x PTS/TRB/AST) array, right
+# aligned so the last column is each player's most recent game, and a whole
+# sheet's features are computed with array operations instead of a Python
+# function per prop row. The values match add_new_columns exactly.
+
+stat_indexes = {
+    "PRA": [0, 1, 2],
+    "PR": [0, 1],
+    "PA": [0, 2],
+    "P": [0],
+    "R": [1],
+    "A": [2],
+}
+
+# Season, last 10 and last 5 games
+windows = (None, 10, 5)
+
+# Column names per window for coverage, minutes, team and opponent win
+# percentage and combined average
+window_columns = {
+    None: [
+        "Season Over Covered %",
+        "Game Average Minutes",
+        "Team Win Percentage",
+        "Opponents Team Win Percentage",
+        "Combined Average Season",
+    ],
+    10: [
+        "Last 10 Games Over Covered %",
+        "Last 10 Games Average Minutes",
+        "Last 10 Games Win Percentage",
+        "Opponents Last 10 Games Win Percentage",
+        "Combined Average Last 10",
+    ],
+    5: [
+        "Last 5 Games Over Covered %",
+        "Last 5 games average minutes",
+        "Last 5 Games Win Percentage",
+        "Opponents Last 5 Games Win Percentage",
+        "Combined Average Last 5",
+    ],
+}
+
+opponent_columns = [
+    "Season Opponent Stats vs Position",
+    "Last 15 Opponent Stats vs Position",
+    "Last 7 Opponent Stats vs Position",
+]
+period_order = ["Season", "Last15", "Last7"]
+
+# In the order add_new_columns assigns them
+feature_columns = (
+    [window_columns[window][0] for window in windows]
+    + ["Position", "Team"]
+    + [window_columns[window][group] for group in range(1, 5) for window in windows]
+    + opponent_columns
+)
+
+
+def columns_for(window):
+    """Column names for a window, worded like the last 10 columns for windows
+    beyond the default three."""
+    if window in window_columns:
+        return window_columns[window]
+    return [
+        f"Last {window} Games Over Covered %",
+        f"Last {window} Games Average Minutes",
+        f"Last {window} Games Win Percentage",
+        f"Opponents Last {window} Games Win Percentage",
+        f"Combined Average Last {window}",
+    ]
+
+
+def ratio(numerator, denominator):
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(len(numerator)),
+        where=denominator > 0,
+    )
+
+
+def team_index(name):
+    # Array index for a team name, -1 (no team) for names that are not teams
+    team = team_id(name)
+    return -1 if team is None else team
+
+
+class FeatureEngine:
+    """Builds the player and team arrays once per slate from the analyzer's
+    scrapers, then adds the feature columns to each stat sheet.
+
+    Window counts, PTS/TRB/AST sums, minute means and win rates are summarized
+    once per player and team when the slate is loaded. The combined stats of
+    PRA, PR and PA are derived from the single stat series the first time a
+    sheet asks for them, so the six sheets only gather per row.
+
+    extra_windows adds columns for more last N windows, e.g. (3, 15, 20).
+    They are answered from the same window indexes, so each one costs a
+    binary search per row rather than another pass over the games."""
+
+    def __init__(self, analyzer, extra_windows=()):
+        self.analyzer = analyzer
+        self.stats_scraper = analyzer.stats_Scraper
+        self.team_scraper = analyzer.team_Scraper
+        self.windows = windows + tuple(
+            window for window in extra_windows if window not in windows
+        )
+        self.player_rows = {}
+        self.games = {}
+        self.loaded_positions = {}
+        self.combined = {}
+
+    def load(self, frames):
+        """Reads every player, team and opponent the sheets in frames need from
+        the scrapers' caches, fetching whatever is missing."""
+        players = sorted(
+            {
+                name
+                for df in frames.values()
+                for name in df["Player Name"].dropna().unique()
+                if name != "N/A"
+            }
+        )
+        self.load_players(players)
+        teams = set(self.player_team_ids)
+        for df in frames.values():
+            if "Teams" in df:
+                for game in df["Teams"].unique():
+                    teams.update(self.game_teams(game))
+        self.load_teams(sorted(team for team in teams if team >= 0))
+        return self
+
+    def load_players(self, players):
+        season_stats, minutes = [], []
+        self.player_rows = {}
+        self.player_teams, self.player_positions = [], []
+        for player_name in players:
+            player_stats = self.load_player(player_name)
+            if not player_stats:
+                continue
+            game_stats, team, position, minute_stats = player_stats[:4]
+            self.player_rows[player_name] = len(season_stats)
+            season_stats.append(game_stats)
+            minutes.append(minute_stats)
+            self.player_teams.append(team)
+            self.player_positions.append(position)
+        self.player_team_ids = np.array(
+            [team_index(team) for team in self.player_teams], dtype=int
+        )
+        self.player_position_ids = np.array(
+            [
+                (
+                    defense_positions.index(position)
+                    if position in defense_positions
+                    else -1
+                )
+                for position in self.player_positions
+            ],
+            dtype=int,
+        )
+        self.stats, self.games_mask = right_aligned(season_stats, (3,))
+        self.stat_indexes = [
+            WindowIndex(self.stats[:, :, stat], self.games_mask) for stat in range(3)
+        ]
+        every_player = np.arange(len(season_stats))
+        self.window_games = np.stack(
+            [self.stat_indexes[0].count(every_player, n) for n in self.windows], axis=1
+        )
+        self.window_totals = np.stack(
+            [
+                np.stack([index.sum(every_player, n) for index in self.stat_indexes], 1)
+                for n in self.windows
+            ],
+            axis=1,
+        )
+        # Minute means stay on statistics.mean, once per player, since a float
+        # sum in NumPy can round differently in the last place
+        self.minute_means = np.full((len(minutes), len(self.windows)), np.nan)
+        for row, minute_stats in enumerate(minutes):
+            if minute_stats:
+                for column, window in enumerate(self.windows):
+                    recent = minute_stats if window is None else minute_stats[-window:]
+                    self.minute_means[row, column] = st.mean(recent)
+
+    def load_player(self, player_name):
+        # A player whose scrape fails is left out, so its rows stay unchanged as
+        # when add_new_columns catches the error
+        try:
+            self.stats_scraper.fetch_player_stats(player_name)
+            return self.stats_scraper.return_Cache_value(player_name)
+        except Exception as e:
+            print(f"Error Processing {player_name}.")
+            print(Exception, e)
+            return None
+
+    def load_team(self, code):
+        # A team whose record fails to load has no record, which stops its rows
+        # at the same column add_new_columns would stop at
+        try:
+            self.team_scraper.find_team_record(code)
+            return self.team_scraper.team_stats_cash.get(code) or []
+        except Exception as e:
+            print(f"Error Processing {code} team record.")
+            print(Exception, e)
+            return []
+
+    def load_teams(self, teams):
+        """Loads the records of the given team ids. Team arrays are indexed by
+        id directly, teams without a record are left NaN."""
+        records = [[] for _ in team_codes]
+        for team in teams:
+            records[team] = self.load_team(team_code(team))
+        self.record_index = WindowIndex(*right_aligned(records))
+        every_team = np.arange(len(records))
+        self.team_games = np.stack(
+            [self.record_index.count(every_team, n) for n in self.windows], axis=1
+        )
+        self.win_rates = np.stack(
+            [self.record_index.mean(every_team, n) for n in self.windows], axis=1
+        )
+
+    def combined_stats(self, stat_type):
+        """(window index of the per game sums, per window means) of the stat
+        type's single stats, for every player. Integer box score sums are exact,
+        so the means equal statistics.mean over the combined games."""
+        if stat_type not in self.combined:
+            stats = stat_indexes[stat_type]
+            if len(stats) == 1:
+                index = self.stat_indexes[stats[0]]
+            else:
+                index = WindowIndex(
+                    self.stats[:, :, stats].sum(axis=2), self.games_mask
+                )
+            totals = self.window_totals[:, :, stats].sum(axis=2)
+            means = np.full(totals.shape, np.nan)
+            np.divide(totals, self.window_games, out=means, where=self.window_games > 0)
+            self.combined[stat_type] = index, means
+        return self.combined[stat_type]
+
+    def game_teams(self, game):
+        # Each distinct "Home @ Away" string is resolved to ids once per slate
+        if game not in self.games:
+            self.games[game] = tuple(
+                -1 if side is None else side for side in game_team_ids(game)
+            )
+        return self.games[game]
+
+    def opponent_ids(self, games, teams):
+        """Opponent id per row, from a Series of games and an array of the
+        players' team ids. Game strings are factorized, so only the distinct
+        games are resolved."""
+        codes, uniques = pd.factorize(games)
+        pairs = np.array([self.game_teams(game) for game in uniques] + [(-1, -1)])
+        # factorize gives missing games code -1, the (-1, -1) pair at the end
+        home, away = pairs[codes, 0], pairs[codes, 1]
+        return np.where((home == teams) & (home >= 0), away, home)
+
+    def load_position(self, position):
+        # Scrapes the position's tables the first time a sheet needs them
+        if position not in self.loaded_positions:
+            try:
+                self.team_scraper.find_position_opponent_stats(position)
+                self.loaded_positions[position] = True
+            except Exception as e:
+                print(f"Error Processing {position} defense vs position.")
+                print(Exception, e)
+                self.loaded_positions[position] = False
+        return self.loaded_positions[position]
+
+    def defense_vs_position(self, position_ids, opponents, stat_type):
+        """(rows, 3) season, last 15 and last 7 opponent stats vs position in
+        one gather from the defense table, NaN where calculate_opponents would
+        have failed."""
+        position_ids = position_ids.copy()
+        for position in np.unique(position_ids[position_ids >= 0]):
+            if not self.load_position(defense_positions[position]):
+                position_ids[position_ids == position] = -1
+        sums = self.team_scraper.defense_table.gather(
+            opponents, position_ids, stat_indexes[stat_type]
+        )
+        return sums[:, [defense_periods.index(period) for period in period_order]]
+
+    def win_percentages(self, teams):
+        """(len(teams), windows) win percentages for an array of team ids, NaN
+        for -1 and teams without a record."""
+        result = np.full((len(teams), len(self.windows)), np.nan)
+        known = teams >= 0
+        result[known] = self.win_rates[teams[known]]
+        return result
+
+    def add_features(self, df, stat_type):
+        """Returns a copy of df with the add_new_columns features filled in. Rows
+        add_new_columns would stop on part way, e.g. a player with no minutes or
+        an opponent without a record, get the same columns it would have set."""
+        if stat_type not in stat_indexes:
+            return df
+        df = df.copy()
+        ou = pd.to_numeric(df["O/U"], errors="coerce").to_numpy(dtype=float)
+        rows = df["Player Name"].map(self.player_rows)
+        valid = rows.notna().to_numpy() & ~np.isnan(ou)
+        players = rows[valid].astype(int).to_numpy()
+        ou = ou[valid]
+
+        # Coverage needs the row's line, everything else is a gather from the
+        # player and team summaries
+        index, means = self.combined_stats(stat_type)
+        teams = self.player_team_ids[players]
+        opponents = self.opponent_ids(df["Teams"][valid], teams)
+        team_wins = self.win_percentages(teams)
+        opponent_wins = self.win_percentages(opponents)
+        features = {
+            "Position": np.array(self.player_positions, dtype=object)[players],
+            "Team": np.array(self.player_teams, dtype=object)[players],
+        }
+        for column, window in enumerate(self.windows):
+            counts = self.window_games[players, column]
+            over = index.over(players, ou, window)
+            coverage, minutes, team, opponent, combined = columns_for(window)
+            features[coverage] = np.where(
+                counts > 0, ratio(over * 1.0, counts) * 100, -99
+            )
+            features[minutes] = self.minute_means[players, column]
+            features[team] = team_wins[:, column]
+            features[opponent] = opponent_wins[:, column]
+            features[combined] = means[players, column]
+
+        # add_new_columns fills the columns in order and stops at the first
+        # step that raises, so each group is only written where every step
+        # before it succeeded
+        names = [columns_for(window) for window in self.windows]
+        steps = [
+            (
+                [columns[0] for columns in names] + ["Position", "Team"],
+                np.ones(len(players), dtype=bool),
+            ),
+            (
+                [columns[1] for columns in names],
+                ~np.isnan(self.minute_means[players, 0]),
+            ),
+            ([columns[2] for columns in names], ~np.isnan(team_wins[:, 0])),
+            ([columns[3] for columns in names], ~np.isnan(opponent_wins[:, 0])),
+            ([columns[4] for columns in names], self.window_games[players, 0] > 0),
+        ]
+        reached = np.ones(len(players), dtype=bool)
+        for _, succeeded in steps:
+            reached = reached & succeeded
+        # Defense vs position is only looked up for rows that get this far, as
+        # it may need a browser scrape
+        opponent_stats = np.full((len(players), 3), np.nan)
+        rows = np.flatnonzero(reached)
+        opponent_stats[rows] = self.defense_vs_position(
+            self.player_position_ids[players[rows]], opponents[rows], stat_type
+        )
+        # calculate_opponents returns 0 for players without a known position
+        opponent_stats[rows[features["Position"][rows] == "Unknown"]] = 0
+        # A period missing from the table stops add_new_columns after the
+        # periods before it, so each column is its own step
+        for column, name in enumerate(opponent_columns):
+            features[name] = opponent_stats[:, column]
+            steps.append(([name], ~np.isnan(opponent_stats[:, column])))
+
+        reached = np.ones(len(players), dtype=bool)
+        index = df.index[valid]
+        for columns, succeeded in steps:
+            reached &= succeeded
+            for column in columns:
+                if column not in df:
+                    df[column] = np.nan
+                    if column in ("Position", "Team"):
+                        df[column] = df[column].astype(object)
+                df.loc[index[reached], column] = features[column][reached]
+        return df
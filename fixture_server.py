@@ -0,0 +1,331 @@
+"""Record and replay harness for running the scrapers without the live sites.
+
+Pages are saved as <directory>/<host>/<path>, with the query string appended
+to the file name after "__". They can be replayed in process through the
+http_client transport, or served from a local HTTP server with injected
+latency and errors.
+
+Example usage, replaying recorded pages with 50ms latency and 5% errors:
+
+    with replaying(
+        "TestFolder/fixtures",
+        FaultInjector(latency=0.05, error_rate=0.05),
+        cache_path="/tmp/replay_cache.sqlite",
+    ):
+        analyzer = PlayerPerformanceAnalyzer(odds_frames)
+        analyzer.enrich_with_coverage()
+
+Or through the local server, e.g. the saved DraftKings feed:
+
+    with FixtureServer("TestFolder/dk_feed") as server:
+        http_client.set_transport(ServerTransport(server.url))
+        scraper = DraftKingsScraper(mode="feed")
+        info = scraper.create_data_table(scraper.scrape_odds())
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import requests
+from collections import namedtuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import http_client
+import http_session
+import rate_limiter
+import response_cache
+
+FixtureResponse = namedtuple("FixtureResponse", ["status_code", "headers", "content"])
+
+
+def fixture_path(directory, url):
+    parsed = urlparse(url)
+    path = parsed.path.strip("/") or "index.html"
+    if parsed.query:
+        path += "__" + re.sub(r"[^A-Za-z0-9=&+%._-]", "_", parsed.query)
+    return os.path.join(directory, parsed.netloc, path)
+
+
+def save_fixture(directory, url, content):
+    path = fixture_path(directory, url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+def load_fixture(directory, url):
+    # Falls back to the file without the query, then to the path without the
+    # host, which is how hand written fixtures like TestFolder/dk_feed are laid out
+    parsed = urlparse(url)
+    candidates = [
+        fixture_path(directory, url),
+        fixture_path(directory, url.split("?")[0]),
+        os.path.join(directory, parsed.path.strip("/")),
+    ]
+    for path in candidates:
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                return file.read()
+    return None
+
+
+class FaultInjector:
+    """Adds latency and random failures to replayed responses. error_rate is
+    the chance a request fails; failures are drawn from error_statuses, where
+    "timeout" raises requests.Timeout instead of returning a status."""
+
+    def __init__(
+        self, latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=(503,), seed=None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def error(self):
+        with self.lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.random.choice(self.error_statuses)
+        return None
+
+
+class RecordingTransport:
+    """Downloads through the pooled sessions and saves every 200 response as a
+    fixture."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, url, timeout=10):
+        response = http_session.get(url, timeout=timeout)
+        if response.status_code == 200:
+            save_fixture(self.directory, url, response.content)
+        return response
+
+
+class ReplayTransport:
+    """Answers requests from recorded fixtures in process, 404 when missing."""
+
+    def __init__(self, directory, faults=None):
+        self.directory = directory
+        self.faults = faults or FaultInjector()
+
+    def __call__(self, url, timeout=10):
+        self.faults.delay()
+        error = self.faults.error()
+        if error == "timeout":
+            raise requests.Timeout(f"Injected timeout for {url}")
+        if error is not None:
+            return FixtureResponse(error, {}, b"")
+        content = load_fixture(self.directory, url)
+        if content is None:
+            return FixtureResponse(404, {}, b"")
+        return FixtureResponse(200, {}, content)
+
+
+class ServerTransport:
+    """Sends every request to a FixtureServer, /<host>/<path>?<query>."""
+
+    def __init__(self, server_url):
+        self.server_url = server_url
+
+    def __call__(self, url, timeout=10):
+        parsed = urlparse(url)
+        local_url = f"{self.server_url}/{parsed.netloc}{parsed.path}"
+        if parsed.query:
+            local_url += "?" + parsed.query
+        return http_session.get(local_url, timeout=timeout)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so runs against the server reuse connections like the live sites
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.faults.delay()
+        error = self.server.faults.error()
+        if error == "timeout":
+            # Hold the connection open past any sensible client timeout
+            time.sleep(60)
+            return
+        if error is not None:
+            self.send_error(error)
+            return
+        parsed = urlparse(self.path)
+        parts = parsed.path.lstrip("/").split("/", 1)
+        content = None
+        if len(parts) == 2:
+            url = f"http://{parts[0]}/{parts[1]}"
+            if parsed.query:
+                url += "?" + parsed.query
+            content = load_fixture(self.server.directory, url)
+        if content is None:
+            content = load_fixture(
+                self.server.directory, f"http://localhost{parsed.path}"
+            )
+        if content is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serves a directory of recorded pages and feed payloads on localhost, so the
+    scrapers can be pointed at it instead of the live sites."""
+
+    def __init__(self, directory, port=0, faults=None):
+        self.directory = directory
+        self.port = port
+        self.faults = faults or FaultInjector()
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), FixtureHandler)
+        self.server.directory = self.directory
+        self.server.faults = self.faults
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Transport, response cache, rate limits, circuit breakers and retry budget from
+# before the first install, put back by uninstall
+saved_state = None
+
+
+def save_state():
+    global saved_state
+    if saved_state is None:
+        saved_state = (
+            http_client.transport,
+            response_cache.shared_cache,
+            dict(rate_limiter.host_limits),
+            dict(http_client.breakers),
+            http_client.retry_budget,
+        )
+
+
+def install_replay(directory, faults=None, cache_path=None, unlimited=True):
+    """Points fetch_page at recorded fixtures. cache_path gives the run its own
+    response cache so replays are not answered by pages cached earlier, and
+    unlimited lifts the per host rate limits so a benchmark measures the
+    scraping path rather than the politeness delay. The replay gets its own
+    circuit breakers and retry budget, so injected faults do not open the live
+    hosts' breakers or spend the run's retries. uninstall undoes it."""
+    save_state()
+    http_client.set_transport(ReplayTransport(directory, faults))
+    with http_client.breakers_lock:
+        http_client.breakers.clear()
+    http_client.retry_budget = http_client.RetryBudget()
+    if cache_path is not None:
+        response_cache.shared_cache = response_cache.ResponseCache(cache_path)
+    if unlimited:
+        for host in list(rate_limiter.host_limits):
+            rate_limiter.host_limits[host] = (1000.0, 1000)
+        rate_limiter.limiters.clear()
+
+
+def install_recording(directory):
+    save_state()
+    http_client.set_transport(RecordingTransport(directory))
+
+
+def uninstall():
+    """Restores the transport, response cache, rate limits, circuit breakers and
+    retry budget that were in place before install_replay or install_recording."""
+    global saved_state
+    if saved_state is None:
+        return
+    transport, cache, host_limits, breakers, retry_budget = saved_state
+    saved_state = None
+    http_client.set_transport(transport)
+    if response_cache.shared_cache not in (cache, None):
+        response_cache.shared_cache.connection.close()
+        response_cache.shared_cache = cache
+    rate_limiter.host_limits.clear()
+    rate_limiter.host_limits.update(host_limits)
+    rate_limiter.limiters.clear()
+    with http_client.breakers_lock:
+        http_client.breakers.clear()
+        http_client.breakers.update(breakers)
+    http_client.retry_budget = retry_budget
+
+
+@contextmanager
+def replaying(directory, faults=None, cache_path=None, unlimited=True):
+    install_replay(directory, faults, cache_path, unlimited)
+    try:
+        yield
+    finally:
+        uninstall()
+
+
+def export_cache(directory):
+    """Writes every page in the response cache out as a fixture."""
+    cache = response_cache.get_shared_cache()
+    rows = cache.connection.execute("SELECT url, content FROM responses").fetchall()
+    for url, content in rows:
+        save_fixture(directory, url, content)
+    print(f"Exported {len(rows)} pages to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay scraper fixtures.")
+    parser.add_argument("command", choices=["serve", "export-cache"])
+    parser.add_argument("directory")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "export-cache":
+        export_cache(args.directory)
+        return
+    faults = FaultInjector(args.latency, args.jitter, args.error_rate, (429, 503))
+    server = FixtureServer(args.directory, args.port, faults).start()
+    print(f"Serving {args.directory} at {server.url}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from collections import namedtuple
+
+GameRow = namedtuple(
+    "GameRow", ["date", "team", "opponent", "pts", "trb", "ast", "minutes"]
+)
+
+
+class GameLog:
+    """One player's season game log, parsed once and shared by feature building
+    (season and last N windows) and next day grading (the slate's game)."""
+
+    def __init__(self, player_name, team, position, games, listed_through=None):
+        self.player_name = player_name
+        self.team = team
+        self.position = position
+        self.games = games
+        # Date of the last row on the fetched page, including games the player
+        # sat out, so the store knows how far the log has been checked
+        self.listed_through = listed_through
+
+    def game_stats(self):
+        return [(game.pts, game.trb, game.ast) for game in self.games]
+
+    def minutes_played(self):
+        return [game.minutes for game in self.games if game.minutes != 0]
+
+    def stats_on(self, game_date):
+        """[pts, trb, ast] of the game played on game_date (ISO format), else
+        None. The whole log is searched, grading a day late or an older slate
+        still finds its game behind later ones. Rows for games the player sat
+        out are not stored, so a DNP is None rather than another game."""
+        for game in reversed(self.games):
+            if game.date == game_date:
+                return [float(game.pts), float(game.trb), float(game.ast)]
+        return None
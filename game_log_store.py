@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+import time
+from game_log import GameLog, GameRow
+
+# Stores from before version 1 keyed players by normalized name, so two players
+# with the same name in a season shared rows. Their player rows are dropped and
+# fetched again by id.
+store_version = 1
+
+
+class GameLogStore:
+    """Local store of per player game rows with a high water mark (date of the
+    newest stored game) per player and season. Scrapers append only games newer
+    than the mark and the analyzer reads game logs back from here. Players are
+    keyed by basketball-reference player id, e.g. "jokicni01", so players who
+    share a name keep separate rows. fetched_through is the date of the last
+    game the fetched log listed, played or not, and decides when the log is
+    stale."""
+
+    def __init__(self, path="Data/game_logs.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version < store_version:
+            existing = self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'players'"
+            ).fetchone()
+            if existing:
+                print(f"Game log store {path} is keyed by name, dropping its players")
+            self.connection.executescript(
+                "DROP TABLE IF EXISTS games; DROP TABLE IF EXISTS players;"
+            )
+        self.connection.executescript(
+            f"""CREATE TABLE IF NOT EXISTS games (
+                player_id TEXT NOT NULL,
+                season INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                team TEXT,
+                opponent TEXT,
+                pts INTEGER,
+                trb INTEGER,
+                ast INTEGER,
+                minutes REAL,
+                PRIMARY KEY (player_id, season, date)
+            );
+            CREATE TABLE IF NOT EXISTS players (
+                player_id TEXT NOT NULL,
+                season INTEGER NOT NULL,
+                team TEXT,
+                position TEXT,
+                high_water TEXT,
+                synced_at REAL,
+                fetched_through TEXT,
+                PRIMARY KEY (player_id, season)
+            );
+            CREATE TABLE IF NOT EXISTS team_games (
+                team TEXT NOT NULL,
+                season INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                opponent TEXT,
+                result INTEGER,
+                PRIMARY KEY (team, season, date)
+            );
+            PRAGMA user_version = {store_version};"""
+        )
+        self.connection.commit()
+
+    def sync_state(self, player_id, season):
+        with self.lock:
+            return self.connection.execute(
+                """SELECT team, fetched_through FROM players
+                WHERE player_id = ? AND season = ?""",
+                (player_id, season),
+            ).fetchone()
+
+    def needs_sync(self, player_id, season, team_last_game=None):
+        """True unless the stored log already covers the latest completed game of
+        the player's team. A log fetched in the morning is stale again once the
+        evening's game is final, and a player who sat out that game is not
+        fetched again until the team plays its next one. Without the team's date
+        the log is always synced. A traded player's old team keeps playing, so
+        the next sync picks up the new team."""
+        state = self.sync_state(player_id, season)
+        if state is None:
+            return True
+        team, fetched_through = state
+        last_game = team_last_game.get(team) if team_last_game else None
+        if last_game is None or fetched_through is None:
+            return True
+        return last_game > fetched_through
+
+    def append(self, game_log, season, player_id):
+        """Stores the games newer than the player's high water mark and returns how
+        many were added."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT high_water FROM players WHERE player_id = ? AND season = ?",
+                (player_id, season),
+            ).fetchone()
+            high_water = row[0] if row else None
+            new_games = [
+                game
+                for game in game_log.games
+                if game.date and (high_water is None or game.date > high_water)
+            ]
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(player_id, season) + tuple(game) for game in new_games],
+            )
+            if new_games:
+                high_water = max(game.date for game in new_games)
+            fetched_through = max(
+                (date for date in (game_log.listed_through, high_water) if date),
+                default=None,
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    player_id,
+                    season,
+                    game_log.team,
+                    game_log.position,
+                    high_water,
+                    time.time(),
+                    fetched_through,
+                ),
+            )
+            self.connection.commit()
+            return len(new_games)
+
+    def load(self, player_id, season, player_name=None):
+        with self.lock:
+            player = self.connection.execute(
+                """SELECT team, position FROM players
+                WHERE player_id = ? AND season = ?""",
+                (player_id, season),
+            ).fetchone()
+            if player is None:
+                return None
+            games = self.connection.execute(
+                """SELECT date, team, opponent, pts, trb, ast, minutes FROM games
+                WHERE player_id = ? AND season = ? ORDER BY date""",
+                (player_id, season),
+            ).fetchall()
+        return GameLog(
+            player_name or player_id,
+            player[0],
+            player[1],
+            [GameRow(*game) for game in games],
+        )
+
+    def append_team_games(self, team, season, games):
+        """Stores a team's (date, opponent, result) games for a season, team and
+        opponent as Basketball Reference codes."""
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO team_games VALUES (?, ?, ?, ?, ?)",
+                [(team, season) + tuple(game) for game in games],
+            )
+            self.connection.commit()
+
+    def load_team_games(self, team, season):
+        with self.lock:
+            return self.connection.execute(
+                """SELECT date, opponent, result FROM team_games
+                WHERE team = ? AND season = ? ORDER BY date""",
+                (team, season),
+            ).fetchall()
+
+
+shared_store = None
+shared_store_lock = threading.Lock()
+
+
+def get_shared_store():
+    global shared_store
+    with shared_store_lock:
+        if shared_store is None:
+            shared_store = GameLogStore()
+    return shared_store
@@ -0,0 +1,217 @@
+import email.utils
+import random
+import threading
+import time
+import requests
+import http_session
+from collections import namedtuple
+from urllib.parse import urlparse
+from response_cache import get_shared_cache
+from rate_limiter import limiter_for_url
+from scraper_metrics import metrics, size_buckets
+
+PageResponse = namedtuple("PageResponse", ["url", "status_code", "content", "from_cache"])
+
+retry_statuses = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host after repeated failures. While open, calls
+    fail fast; once the cooldown is over a single trial request is let through
+    and the breaker closes again if it succeeds."""
+
+    def __init__(self, failure_threshold=5, cooldown=120):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_until = 0.0
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.failures < self.failure_threshold:
+                return True
+            if time.monotonic() < self.opened_until or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.trial_running = False
+
+    def end_trial(self):
+        # For a trial that ended in neither a success nor a failure, e.g. an
+        # unexpected exception, so the next call can run a new one
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self, cooldown=None):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_until = time.monotonic() + max(
+                    self.cooldown, cooldown or 0
+                )
+
+
+class RetryBudget:
+    """Caps retries for the whole run at minimum plus ratio times the number of
+    requests made, so a struggling host cannot turn every fetch into a retry
+    storm."""
+
+    def __init__(self, ratio=0.2, minimum=10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def take(self):
+        with self.lock:
+            if self.retries >= self.minimum + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+breakers = {}
+breakers_lock = threading.Lock()
+retry_budget = RetryBudget()
+
+# Callable used for downloads, (url, timeout) -> response. None means the pooled
+# keep-alive sessions in http_session, fixture_server swaps in recording and
+# replay transports.
+transport = None
+
+
+def set_transport(new_transport):
+    global transport
+    transport = new_transport
+
+
+def breaker_for_url(url):
+    host = urlparse(url).netloc
+    with breakers_lock:
+        if host not in breakers:
+            breakers[host] = CircuitBreaker()
+        return breakers[host]
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=2.0, max_delay=60.0):
+    # Full jitter keeps retrying threads from lining up on the same instant
+    return random.uniform(0, min(max_delay, base * 2**attempt))
+
+
+def fetch_page(url, timeout=10, use_cache=True, max_attempts=4, max_delay=60.0):
+    """Fetches url through the shared response cache. Only 200 responses are
+    stored, so failures are retried on the next call. Downloads go through the
+    per host rate limiter, cache hits do not.
+
+    429 and 5xx responses and connection errors are retried with exponential
+    backoff, honoring Retry-After up to max_delay, while the run's retry budget
+    lasts. A 429 also pauses the host's rate limiter. Hosts that keep failing
+    trip a circuit breaker and fail fast with a 503 until its cooldown ends."""
+    host = urlparse(url).netloc
+    cache = get_shared_cache() if use_cache else None
+    if cache is not None:
+        content = cache.get(url)
+        metrics.inc(
+            "scraper_cache_lookups_total",
+            cache="response",
+            result="miss" if content is None else "hit",
+        )
+        if content is not None:
+            return PageResponse(url, 200, content, True)
+
+    limiter = limiter_for_url(url)
+    breaker = breaker_for_url(url)
+    for attempt in range(max_attempts):
+        if not breaker.allow():
+            metrics.inc("scraper_circuit_open_total", host=host)
+            return PageResponse(url, 503, b"", False)
+        waited = limiter.acquire()
+        metrics.inc("scraper_rate_limit_sleep_seconds_total", waited, host=host)
+        retry_budget.record_request()
+        if attempt:
+            metrics.inc("scraper_retries_total", host=host)
+        start = time.perf_counter()
+        try:
+            response = (transport or http_session.get)(url, timeout=timeout)
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as e:
+            metrics.inc("scraper_responses_total", host=host, status=type(e).__name__)
+            breaker.record_failure()
+            if attempt == max_attempts - 1 or not retry_budget.take():
+                raise
+            backoff_sleep(backoff_delay(attempt, max_delay=max_delay), host)
+            continue
+        except requests.RequestException as e:
+            # Not worth retrying, e.g. TooManyRedirects or InvalidURL
+            metrics.inc("scraper_responses_total", host=host, status=type(e).__name__)
+            breaker.record_failure()
+            raise
+        except Exception:
+            # Any other error still ends a half open trial, or the breaker would
+            # refuse the host for the rest of the run
+            breaker.end_trial()
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.observe("scraper_request_seconds", elapsed, host=host)
+        metrics.observe(
+            "scraper_response_bytes", len(response.content), size_buckets, host=host
+        )
+        metrics.inc("scraper_responses_total", host=host, status=response.status_code)
+
+        if response.status_code not in retry_statuses:
+            breaker.record_success()
+            if response.status_code == 200 and cache is not None:
+                cache.set(url, response.content)
+            return PageResponse(url, response.status_code, response.content, False)
+
+        retry_after = retry_after_seconds(response)
+        breaker.record_failure(retry_after)
+        if response.status_code == 429:
+            limiter.pause(
+                max_delay if retry_after is None else min(retry_after, max_delay)
+            )
+        if (
+            attempt == max_attempts - 1
+            or (retry_after is not None and retry_after > max_delay)
+            or not retry_budget.take()
+        ):
+            # Waiting longer than max_delay costs more than failing this page
+            return PageResponse(url, response.status_code, response.content, False)
+        if retry_after is None:
+            backoff_sleep(backoff_delay(attempt, max_delay=max_delay), host)
+        # A 429 already paused the limiter, acquire() waits it out
+        elif response.status_code != 429:
+            backoff_sleep(retry_after, host)
+
+
+def backoff_sleep(seconds, host):
+    metrics.inc("scraper_backoff_sleep_seconds_total", seconds, host=host)
+    time.sleep(seconds)
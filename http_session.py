@@ -0,0 +1,109 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util import make_headers
+from scraper_metrics import metrics
+
+# Keep-alive sessions shared by every requests based download, one per origin
+# (scheme and host) so each host gets its own connection pool. Connections are
+# reused across pages instead of paying a TCP and TLS handshake per request.
+
+# Seconds allowed to open a connection, the read timeout comes from the caller
+connect_timeout = 3.05
+
+# Enough pooled connections for the prefetch and backfill worker threads
+pool_size = 8
+
+# gzip and deflate always, br as well when the brotli package is installed,
+# since urllib3 can only decode what it has a decoder for
+session_headers = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+    "Connection": "keep-alive",
+}
+
+sessions = {}
+sessions_lock = threading.Lock()
+# Connections opened per origin as of the last request, to count new ones
+connections_seen = {}
+
+
+def new_session():
+    session = requests.Session()
+    session.headers.update(session_headers)
+    # Retries are handled by http_client.fetch_page, not the adapter
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def origin(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def session_for_url(url):
+    key = origin(url)
+    with sessions_lock:
+        if key not in sessions:
+            sessions[key] = new_session()
+        return sessions[key]
+
+
+def pool_counts(session, url):
+    # (connections opened, requests sent) over the session's urllib3 pools. The
+    # pools are read as they are, looking one up by url would create a new one.
+    pools = session.get_adapter(url).poolmanager.pools
+    connections = requests_sent = 0
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is not None:
+            connections += pool.num_connections
+            requests_sent += pool.num_requests
+    return connections, requests_sent
+
+
+def get(url, timeout=10):
+    """requests.get through the host's pooled session. Records how many new
+    connections the host needed in scraper_connections_opened_total."""
+    session = session_for_url(url)
+    try:
+        return session.get(url, timeout=(connect_timeout, timeout))
+    finally:
+        record_connections(session, url)
+
+
+def record_connections(session, url):
+    key = origin(url)
+    connections, _ = pool_counts(session, url)
+    with sessions_lock:
+        opened = connections - connections_seen.get(key, 0)
+        connections_seen[key] = connections
+    if opened > 0:
+        metrics.inc(
+            "scraper_connections_opened_total", opened, host=urlparse(url).netloc
+        )
+
+
+def connection_reuse():
+    """Returns {origin: (requests, connections opened, reuse rate)} for the run."""
+    with sessions_lock:
+        items = list(sessions.items())
+    stats = {}
+    for key, session in items:
+        connections, requests_sent = pool_counts(session, key)
+        if requests_sent:
+            reuse = 1 - connections / requests_sent
+            stats[key] = (requests_sent, connections, reuse)
+    return stats
+
+
+def close_sessions():
+    with sessions_lock:
+        for session in sessions.values():
+            session.close()
+        sessions.clear()
+        connections_seen.clear()
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import datetime
+import os
+import time
+from DKbetscraper import DraftKingsScraper
+
+delta_columns = [
+    "Timestamp",
+    "Stat Type",
+    "Teams",
+    "Player Name",
+    "Change",
+    "O/U",
+    "Odds for Over",
+    "Odds for Under",
+]
+
+
+class OddsPoller:
+    """Re-reads the DraftKings prop markets every interval seconds and appends only
+    the rows that changed since the previous poll to a CSV file. Only the latest
+    line of each market is kept in memory, so memory stays flat over a slate and
+    the file grows with line movement rather than with the number of polls."""
+
+    def __init__(self, scraper=None, interval=60, path="DataFrames/odds_deltas.csv"):
+        self.scraper = (
+            scraper if scraper is not None else DraftKingsScraper(mode="feed")
+        )
+        self.interval = interval
+        self.path = path
+        self.state = {}
+
+    def snapshot(self):
+        data = self.scraper.scrape_odds()
+        snapshot = {}
+        for stat_type, games in data.items():
+            if not games:
+                # A failed or empty category read keeps its last known lines
+                # rather than logging every market as removed and re-added
+                snapshot.update(
+                    (key, line) for key, line in self.state.items() if key[0] == stat_type
+                )
+                continue
+            for game in games:
+                for row in game:
+                    if row["Player Name"] == "N/A":
+                        continue
+                    key = (stat_type, row["Teams"], row["Player Name"])
+                    snapshot[key] = (
+                        row["O/U"],
+                        row["Odds for Over"],
+                        row["Odds for Under"],
+                    )
+        return snapshot
+
+    def diff(self, snapshot):
+        changes = []
+        for key, line in snapshot.items():
+            previous = self.state.get(key)
+            if previous is None:
+                changes.append((key, "new", line))
+            elif previous != line:
+                changes.append((key, "changed", line))
+        for key in self.state.keys() - snapshot.keys():
+            changes.append((key, "removed", ("N/A", "N/A", "N/A")))
+        return changes
+
+    def write(self, changes, timestamp):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(delta_columns)
+            for (stat_type, teams, player), change, line in changes:
+                writer.writerow([timestamp, stat_type, teams, player, change, *line])
+
+    def poll_once(self):
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        snapshot = self.snapshot()
+        changes = self.diff(snapshot)
+        if changes:
+            self.write(changes, timestamp)
+        self.state = snapshot
+        return changes
+
+    def run(self, duration=None):
+        """Polls until duration seconds have passed, or forever when None."""
+        start = time.monotonic()
+        while duration is None or time.monotonic() - start < duration:
+            poll_started = time.monotonic()
+            try:
+                changes = self.poll_once()
+                print(f"{len(changes)} odds changes")
+            except Exception as e:
+                print(f"Error polling odds: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - poll_started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll DraftKings prop lines.")
+    parser.add_argument("--interval", type=float, default=60)
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--mode", choices=["feed", "browser"], default="feed")
+    parser.add_argument("--path", default="DataFrames/odds_deltas.csv")
+    args = parser.parse_args()
+    poller = OddsPoller(DraftKingsScraper(mode=args.mode), args.interval, args.path)
+    poller.run(args.duration)
+
+
+if __name__ == "__main__":
+    main()
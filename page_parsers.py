@@ -0,0 +1,179 @@
+import datetime
+import lxml.etree
+import lxml.html
+from scraper_metrics import metrics
+
+# Targeted extraction with lxml's C parser and XPath. Each function only walks
+# the rows it needs instead of building and searching a BeautifulSoup tree.
+
+
+def has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def cell_text(cell):
+    return cell.text_content() if cell is not None else None
+
+
+@metrics.timed("scraper_parse_seconds", page="game_log")
+def parse_game_log_page(content):
+    """Returns the pgl_basic rows of a basketball-reference game log as dicts of
+    data-stat -> text, plus the player's current team and position text."""
+    tree = lxml.html.fromstring(content)
+    rows = [
+        {td.get("data-stat"): td.text_content() for td in row.iterchildren("td")}
+        for row in tree.xpath('//tr[starts-with(@id, "pgl_basic")]')
+    ]
+    team_cells = tree.xpath('//td[@data-stat="team_id"]')
+    team = team_cells[-1].text_content() if team_cells else "Free Agent"
+    position_tags = tree.xpath('//strong[contains(text(), "Position:")]')
+    position_text = (
+        (position_tags[0].tail or "").strip() if position_tags else "Unknown"
+    )
+    return rows, team, position_text
+
+
+@metrics.timed("scraper_parse_seconds", page="team_games")
+def parse_team_results(content):
+    """Returns the ordered W/L results from a team's season games page as 1/0."""
+    tree = lxml.html.fromstring(content)
+    results = []
+    for cell in tree.xpath('//tr/td[@data-stat="game_result"]'):
+        result = cell.text_content().strip()
+        if result == "W":
+            results.append(1)
+        elif result == "L":
+            results.append(0)
+    return results
+
+
+@metrics.timed("scraper_parse_seconds", page="player_listing")
+def parse_player_listing(content):
+    """Returns (name, player id) pairs from a league per game listing."""
+    tree = lxml.html.fromstring(content)
+    return [
+        (cell.text_content(), cell.get("data-append-csv"))
+        for cell in tree.xpath('//td[@data-stat="player"][@data-append-csv]')
+    ]
+
+
+dk_game_xpath = lxml.etree.XPath(
+    f'//*[{has_class("sportsbook-event-accordion__wrapper")} and {has_class("expanded")}]'
+)
+dk_teams_xpath = lxml.etree.XPath(
+    './/div[starts-with(@aria-label, "Event Accordion for")]'
+)
+dk_name_xpath = lxml.etree.XPath(f'.//span[{has_class("sportsbook-row-name")}]')
+dk_outcome_xpath = lxml.etree.XPath(
+    f'.//div[{has_class("sportsbook-outcome-cell__body")}]'
+)
+dk_label_xpath = lxml.etree.XPath(
+    f'.//span[{has_class("sportsbook-outcome-cell__label")}]'
+)
+dk_line_xpath = lxml.etree.XPath(
+    f'.//span[{has_class("sportsbook-outcome-cell__line")}]'
+)
+dk_odds_xpath = lxml.etree.XPath(f'.//span[{has_class("sportsbook-odds")}]')
+
+
+@metrics.timed("scraper_parse_seconds", page="dk_page")
+def find_dk_games(html):
+    return dk_game_xpath(lxml.html.fromstring(html))
+
+
+def first_text(element, xpath):
+    found = xpath(element)
+    return found[0].text_content() if found else "N/A"
+
+
+@metrics.timed("scraper_parse_seconds", page="dk_game")
+def parse_dk_game(game):
+    """Extracts the team names, player names and odds rows from one DraftKings
+    event accordion."""
+    team_names_div = dk_teams_xpath(game)
+    teams = (
+        team_names_div[0].get("aria-label").replace("Event Accordion for ", "")
+        if team_names_div
+        else "Teams not found"
+    )
+    data = []
+    for row in game.iter("tr"):
+        ou_value_over = odds_over = odds_under = "N/A"
+        for outcome in dk_outcome_xpath(row):
+            label = first_text(outcome, dk_label_xpath)
+            odds = first_text(outcome, dk_odds_xpath)
+            # The sheet has one O/U column, the over line
+            if label.startswith("O"):
+                ou_value_over = first_text(outcome, dk_line_xpath)
+                odds_over = odds
+            elif label.startswith("U"):
+                odds_under = odds
+        data.append(
+            {
+                "Teams": teams,
+                "Player Name": first_text(row, dk_name_xpath),
+                "O/U": ou_value_over,
+                "Odds for Over": odds_over,
+                "Odds for Under": odds_under,
+            }
+        )
+    return data
+
+
+@metrics.timed("scraper_parse_seconds", page="schedule")
+def parse_league_schedule(content):
+    """Returns (date, visitor, visitor points, home, home points) for every game
+    on a basketball-reference league schedule page. Points are None for games
+    that have not been played yet."""
+    tree = lxml.html.fromstring(content)
+    games = []
+    for row in tree.xpath('//table[@id="schedule"]/tbody/tr[not(@class)]'):
+        cells = {
+            cell.get("data-stat"): cell for cell in row.iterchildren("th", "td")
+        }
+        visitor_link = cells.get("visitor_team_name")
+        home_link = cells.get("home_team_name")
+        if visitor_link is None or home_link is None:
+            continue
+        visitor = team_code_from_cell(visitor_link)
+        home = team_code_from_cell(home_link)
+        visitor_pts = cell_text(cells.get("visitor_pts")) or ""
+        home_pts = cell_text(cells.get("home_pts")) or ""
+        games.append(
+            (
+                schedule_date((cell_text(cells.get("date_game")) or "").strip()),
+                visitor,
+                int(visitor_pts) if visitor_pts.strip() else None,
+                home,
+                int(home_pts) if home_pts.strip() else None,
+            )
+        )
+    return games
+
+
+@metrics.timed("scraper_parse_seconds", page="schedule")
+def parse_schedule_months(content):
+    """Returns the monthly page paths linked from a season's schedule page, in
+    the order listed, e.g. /leagues/NBA_2020_games-october-2019.html."""
+    tree = lxml.html.fromstring(content)
+    paths = []
+    for href in tree.xpath('//div[contains(@class, "filter")]//a/@href'):
+        if "_games-" in href and href not in paths:
+            paths.append(href)
+    return paths
+
+
+def schedule_date(text):
+    # "Tue, Oct 24, 2023" -> "2023-10-24", the format the game logs use
+    try:
+        return datetime.datetime.strptime(text, "%a, %b %d, %Y").date().isoformat()
+    except ValueError:
+        return text
+
+
+def team_code_from_cell(cell):
+    # Team cells link to /teams/BOS/2024.html
+    links = cell.xpath(".//a/@href")
+    if links:
+        return links[0].split("/")[2]
+    return cell.text_content().strip()
@@ -0,0 +1,181 @@
+import argparse
+import glob
+import os
+import re
+import time
+from bs4 import BeautifulSoup
+from page_parsers import (
+    find_dk_games,
+    parse_dk_game,
+    parse_game_log_page,
+    parse_team_results,
+)
+from response_cache import get_shared_cache, page_type_for_url
+
+# Compares the lxml parsers in page_parsers.py with the BeautifulSoup code they
+# replaced, over pages saved in a fixture directory:
+#   gamelog_*.html     basketball-reference player game logs
+#   team_games_*.html  basketball-reference team season schedules
+#   dk_*.html          DraftKings props page_source dumps
+# A small set is committed in TestFolder/pages, more can be exported from the
+# response cache with --export.
+
+fixture_dir = "TestFolder/pages"
+
+
+def legacy_game_log(content):
+    soup = BeautifulSoup(content, "html.parser")
+    game_rows = soup.findAll("tr", {"id": lambda x: x and x.startswith("pgl_basic")})
+    stats = []
+    for row in game_rows:
+        if row.find("td", {"data-stat": "pts"}) is None:
+            continue
+        stats.append(
+            (
+                int(row.find("td", {"data-stat": "pts"}).text or 0),
+                int(row.find("td", {"data-stat": "trb"}).text or 0),
+                int(row.find("td", {"data-stat": "ast"}).text or 0),
+            )
+        )
+    team = (
+        soup.findAll("td", {"data-stat": "team_id"})[-1].text
+        if soup.findAll("td", {"data-stat": "team_id"})
+        else "Free Agent"
+    )
+    return stats, team
+
+
+def fast_game_log(content):
+    rows, team, _ = parse_game_log_page(content)
+    stats = [
+        (int(row["pts"] or 0), int(row["trb"] or 0), int(row["ast"] or 0))
+        for row in rows
+        if "pts" in row
+    ]
+    return stats, team
+
+
+def legacy_team_results(content):
+    soup = BeautifulSoup(content, "html.parser")
+    results = []
+    for game_row in soup.findAll("tr"):
+        cell = game_row.find("td", {"data-stat": "game_result"})
+        if cell and cell.text.strip() in ("W", "L"):
+            results.append(1 if cell.text.strip() == "W" else 0)
+    return results
+
+
+def legacy_text(element, name, class_name):
+    found = element.find(name, class_=class_name)
+    return found.text if found else "N/A"
+
+
+def legacy_dk(content):
+    soup = BeautifulSoup(content, "html.parser")
+    data = []
+    for game in soup.find_all(class_="sportsbook-event-accordion__wrapper expanded"):
+        team_names_div = game.find(
+            "div", {"aria-label": re.compile(r"^Event Accordion for.*")}
+        )
+        teams = (
+            team_names_div["aria-label"].replace("Event Accordion for ", "")
+            if team_names_div
+            else "Teams not found"
+        )
+        for row in game.findAll("tr"):
+            ou_value_over = odds_over = odds_under = "N/A"
+            for outcome in row.find_all("div", class_="sportsbook-outcome-cell__body"):
+                label = legacy_text(outcome, "span", "sportsbook-outcome-cell__label")
+                ou_value = legacy_text(outcome, "span", "sportsbook-outcome-cell__line")
+                odds = legacy_text(outcome, "span", "sportsbook-odds")
+                if label.startswith("O"):
+                    ou_value_over, odds_over = ou_value, odds
+                elif label.startswith("U"):
+                    odds_under = odds
+            data.append(
+                (
+                    teams,
+                    legacy_text(row, "span", "sportsbook-row-name"),
+                    ou_value_over,
+                    odds_over,
+                    odds_under,
+                )
+            )
+    return data
+
+
+def fast_dk(content):
+    return [
+        (
+            row["Teams"],
+            row["Player Name"],
+            row["O/U"],
+            row["Odds for Over"],
+            row["Odds for Under"],
+        )
+        for game in find_dk_games(content)
+        for row in parse_dk_game(game)
+    ]
+
+
+parsers = {
+    "gamelog": (legacy_game_log, fast_game_log),
+    "team_games": (legacy_team_results, parse_team_results),
+    "dk": (legacy_dk, fast_dk),
+}
+
+
+def time_parser(parser, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for content in pages:
+            parser(content)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def export_cache(directory):
+    cache = get_shared_cache()
+    os.makedirs(directory, exist_ok=True)
+    rows = cache.connection.execute("SELECT url, content FROM responses").fetchall()
+    count = 0
+    for url, content in rows:
+        page_type = page_type_for_url(url)
+        if page_type not in parsers:
+            continue
+        name = re.sub(r"[^A-Za-z0-9]+", "_", url.split(".com/")[-1]).strip("_")
+        with open(os.path.join(directory, f"{page_type}_{name}.html"), "wb") as file:
+            file.write(content)
+        count += 1
+    print(f"Exported {count} pages to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page parsers.")
+    parser.add_argument("--fixtures", default=fixture_dir)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--export", action="store_true")
+    args = parser.parse_args()
+
+    if args.export:
+        export_cache(args.fixtures)
+
+    for page_type, (legacy, fast) in parsers.items():
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.fixtures, f"{page_type}_*.html"))):
+            with open(path, "rb") as file:
+                pages.append(file.read())
+        if not pages:
+            print(f"{page_type}: no fixture pages")
+            continue
+        mismatches = sum(1 for content in pages if legacy(content) != fast(content))
+        legacy_time = time_parser(legacy, pages, args.repeat)
+        fast_time = time_parser(fast, pages, args.repeat)
+        print(
+            f"{page_type}: {len(pages)} pages, bs4 {legacy_time * 1000:.1f} ms/page, "
+            f"lxml {fast_time * 1000:.1f} ms/page, {legacy_time / fast_time:.1f}x faster, "
+            f"{mismatches} mismatched outputs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import difflib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from http_client import fetch_page
+from page_parsers import parse_player_listing
+
+name_suffixes = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+# Bumped when the way names are keyed changes, older index files are rebuilt
+index_version = 2
+
+# A fuzzy match must score this much higher than the next best name
+fuzzy_margin = 0.1
+
+
+def normalize_name(name, keep_suffixes=False):
+    """Lowercases a player name and strips accents, punctuation and suffixes so
+    "Nikola Jokić" and "Nikola Jokic" or "Jaren Jackson Jr." and "Jaren Jackson"
+    end up on the same key."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = name.lower().replace("-", " ")
+    name = re.sub(r"[^a-z ]", "", name)
+    words = [
+        word for word in name.split() if keep_suffixes or word not in name_suffixes
+    ]
+    return " ".join(words)
+
+
+class PlayerIndex:
+    """Maps DraftKings player names to basketball-reference player ids, e.g.
+    "jokicni01". Built once from the league per game listing and kept on disk."""
+
+    def __init__(
+        self,
+        path="Cache/player_index.json",
+        season=2024,
+        aliases_path="player_aliases.json",
+        failure_ttl=24 * 60 * 60,
+    ):
+        self.path = path
+        self.season = season
+        self.aliases_path = aliases_path
+        self.failure_ttl = failure_ttl
+        self.lock = threading.RLock()
+        # Normalized name with its suffix kept -> player id
+        self.players = {}
+        # Name without suffix -> ids of the players it could be, so "Gary Payton"
+        # and "Gary Payton II" stay apart while "Jaren Jackson" still finds
+        # "Jaren Jackson Jr."
+        self.stripped = {}
+        # Normalized name -> time of the last failed lookup. Names in here are not
+        # searched again until failure_ttl has passed.
+        self.failures = {}
+        self.aliases = {}
+        self.loaded = False
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            if os.path.exists(self.path):
+                with open(self.path) as file:
+                    saved = json.load(file)
+                if (
+                    saved.get("season") == self.season
+                    and saved.get("version") == index_version
+                ):
+                    self.players = saved["players"]
+                    self.failures = saved.get("failures", {})
+            if self.aliases_path and os.path.exists(self.aliases_path):
+                with open(self.aliases_path) as file:
+                    self.aliases = {
+                        normalize_name(name, keep_suffixes=True): normalize_name(
+                            alias, keep_suffixes=True
+                        )
+                        for name, alias in json.load(file).items()
+                    }
+            self.index_stripped()
+            self.loaded = True
+            if not self.players:
+                self.build()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(
+                {
+                    "season": self.season,
+                    "version": index_version,
+                    "built": time.time(),
+                    "players": self.players,
+                    "failures": self.failures,
+                },
+                file,
+                indent=1,
+            )
+
+    def build(self):
+        url = f"https://www.basketball-reference.com/leagues/NBA_{self.season}_per_game.html"
+        response = fetch_page(url)
+        if response.status_code != 200:
+            print(f"Failed to build player index, response code: {response.status_code}")
+            return
+        players = {
+            normalize_name(name, keep_suffixes=True): player_id
+            for name, player_id in parse_player_listing(response.content)
+        }
+        with self.lock:
+            # Keep names learned from earlier searches, the listing only has
+            # players who have already appeared this season.
+            players.update(self.players)
+            self.players = players
+            self.index_stripped()
+            self.save()
+
+    def index_stripped(self):
+        self.stripped = {}
+        for key, player_id in self.players.items():
+            self.stripped.setdefault(normalize_name(key), set()).add(player_id)
+
+    def key(self, player_name):
+        # DraftKings spellings that normalizing alone cannot fix, e.g. "Nic
+        # Claxton" for "Nicolas Claxton", come from the alias table
+        key = normalize_name(player_name, keep_suffixes=True)
+        alias = self.aliases.get(key)
+        if alias is None:
+            alias = self.aliases.get(normalize_name(key))
+        return alias or key
+
+    def add(self, player_name, player_id):
+        self.load()
+        with self.lock:
+            key = self.key(player_name)
+            self.players[key] = player_id
+            self.stripped.setdefault(normalize_name(key), set()).add(player_id)
+            self.failures.pop(key, None)
+            self.save()
+
+    def record_failure(self, player_name):
+        self.load()
+        with self.lock:
+            self.failures[self.key(player_name)] = time.time()
+            self.save()
+
+    def recently_failed(self, player_name):
+        self.load()
+        failed_at = self.failures.get(self.key(player_name))
+        return failed_at is not None and time.time() - failed_at < self.failure_ttl
+
+    def lookup(self, player_name, cutoff=0.85):
+        """Returns the player id for player_name, or None so the caller falls
+        back to a search. The suffix is dropped only when that leaves a single
+        player. A fuzzy match is accepted only when one name scores above cutoff
+        and every other name scores well below it, since a rookie missing from
+        the listing, or Jalen next to Jaylin Williams, would otherwise get some
+        other player's id."""
+        self.load()
+        key = self.key(player_name)
+        with self.lock:
+            if key in self.players:
+                return self.players[key]
+            candidates = self.stripped.get(normalize_name(key), ())
+            if len(candidates) == 1:
+                return next(iter(candidates))
+            names = list(self.players)
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+        scores = []
+        for name in names:
+            matcher.set_seq1(name)
+            # The cheap upper bounds first, as difflib.get_close_matches does
+            if (
+                matcher.real_quick_ratio() >= cutoff - fuzzy_margin
+                and matcher.quick_ratio() >= cutoff - fuzzy_margin
+            ):
+                scores.append((matcher.ratio(), name))
+        scores.sort(reverse=True)
+        if not scores or scores[0][0] < cutoff:
+            return None
+        if len(scores) > 1 and scores[0][0] - scores[1][0] < fuzzy_margin:
+            return None
+        return self.players[scores[0][1]]
+
+
+def player_id_from_url(url):
+    match = re.search(r"/players/\w/(\w+)", url)
+    return match.group(1) if match else None
+
+
+def gamelog_url(player_id, season=2024):
+    return f"https://www.basketball-reference.com/players/{player_id[0]}/{player_id}/gamelog/{season}"
+
+
+shared_index = None
+shared_index_lock = threading.Lock()
+
+
+def get_shared_index():
+    global shared_index
+    with shared_index_lock:
+        if shared_index is None:
+            shared_index = PlayerIndex()
+    return shared_index
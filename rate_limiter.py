@@ -0,0 +1,76 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+# Requests per second and burst size allowed for each host. basketball-reference
+# blocks clients that go over 20 requests a minute, so the rate plus the burst
+# has to stay under that in any 60 second window.
+host_limits = {
+    "www.basketball-reference.com": (0.3, 2),
+    "default": (1.0, 5),
+}
+
+
+class TokenBucket:
+    """Token bucket that hands out request slots. Tokens keep refilling while the
+    caller is busy parsing, so a wait only happens once the budget is used up."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        # Time the tokens were last refilled up to. A pause moves it into the
+        # future, no tokens accrue until then.
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def reserve(self):
+        # Takes a token now and returns how long the caller has to wait before
+        # using it. Going negative queues concurrent callers one slot apart.
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.tokens -= 1
+            wait = self.updated - now
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def pause(self, seconds):
+        """Holds back every caller for seconds, e.g. after the host answered 429.
+        Callers waiting on the pause are released one slot apart after it ends,
+        not all at once."""
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.updated = max(self.updated, now + seconds)
+            self.tokens = min(self.tokens, 1)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+limiters = {}
+limiters_lock = threading.Lock()
+
+
+def limiter_for_host(host):
+    with limiters_lock:
+        if host not in limiters:
+            rate, capacity = host_limits.get(host, host_limits["default"])
+            limiters[host] = TokenBucket(rate, capacity)
+        return limiters[host]
+
+
+def limiter_for_url(url):
+    return limiter_for_host(urlparse(url).netloc)
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+import time
+
+# How long a cached page stays fresh, by page type. Game logs and team schedules
+# change at most once a day, search results basically never.
+page_ttls = {
+    "gamelog": 6 * 60 * 60,
+    "team_games": 6 * 60 * 60,
+    "schedule": 6 * 60 * 60,
+    "search": 30 * 24 * 60 * 60,
+    "default": 60 * 60,
+}
+
+
+def page_type_for_url(url):
+    if "/gamelog/" in url:
+        return "gamelog"
+    if "/teams/" in url and url.endswith("_games.html"):
+        return "team_games"
+    if "/leagues/" in url and "_games" in url:
+        return "schedule"
+    if "/search/" in url:
+        return "search"
+    return "default"
+
+
+class ResponseCache:
+    """Disk backed cache of page bodies keyed by URL, with per page type TTLs and
+    a size cap enforced by evicting the least recently used pages."""
+
+    def __init__(self, path="Cache/http_responses.sqlite", max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                page_type TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self.connection.commit()
+
+    def get(self, url):
+        """Returns the cached body for url, or None if it is missing or stale."""
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT page_type, content, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            page_type, content, fetched_at = row
+            if now - fetched_at > page_ttls.get(page_type, page_ttls["default"]):
+                self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.connection.commit()
+                return None
+            self.connection.execute(
+                "UPDATE responses SET last_access = ? WHERE url = ?", (now, url)
+            )
+            self.connection.commit()
+            return content
+
+    def set(self, url, content):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (url, page_type_for_url(url), content, len(content), now, now),
+            )
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        # Called with the lock held. Drops least recently used pages until the
+        # cache fits under max_bytes again.
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT url, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def invalidate(self, url):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+
+shared_cache = None
+shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    global shared_cache
+    with shared_cache_lock:
+        if shared_cache is None:
+            shared_cache = ResponseCache()
+    return shared_cache
@@ -0,0 +1,155 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Run metrics for the scrapers: counters and histograms keyed by name and labels,
+# exported as a JSON run report and a Prometheus text file.
+
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+size_buckets = (1024, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=latency_buckets, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer."""
+
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self):
+        with self.lock:
+            return {
+                "started": self.started,
+                "duration_seconds": time.time() - self.started,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "mean": histogram.sum / histogram.count
+                        if histogram.count
+                        else 0.0,
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for bound, count in histogram.cumulative():
+                    bucket_labels = labels + (("le", repr(float(bound))),)
+                    lines.append(
+                        f"{name}_bucket{format_labels(bucket_labels)} {count}"
+                    )
+                inf_labels = labels + (("le", "+Inf"),)
+                lines.append(
+                    f"{name}_bucket{format_labels(inf_labels)} {histogram.count}"
+                )
+                lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, path_prefix="DataFrames/run_metrics"):
+        """Writes <path_prefix>.json and <path_prefix>.prom."""
+        directory = os.path.dirname(path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path_prefix + ".json", "w") as file:
+            json.dump(self.report(), file, indent=1)
+        with open(path_prefix + ".prom", "w") as file:
+            file.write(self.prometheus_text())
+
+
+def metric_key(name, labels):
+    # Label values are kept as strings so keys sort, e.g. status=200 and
+    # status="Timeout" on the same counter
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{escape_label(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+metrics = Metrics()
@@ -0,0 +1,43 @@
+# Extraction helpers that pull a whole table or block of markup out of the page
+# in one execute_script call, instead of a WebDriver round trip per row and cell.
+
+table_script = """
+const table = document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (!table) {
+    return null;
+}
+const headers = Array.from(table.querySelectorAll(":scope > thead > tr > th")).map(
+    (th) => th.innerText.trim()
+);
+const rows = Array.from(table.querySelectorAll(":scope > tbody > tr")).map((tr) =>
+    Array.from(tr.children)
+        .filter((cell) => cell.tagName === "TD" || cell.tagName === "TH")
+        .map((cell) => cell.innerText.trim())
+);
+return [headers, rows];
+"""
+
+outer_html_script = """
+return Array.from(document.querySelectorAll(arguments[0])).map(
+    (element) => element.outerHTML
+);
+"""
+
+
+def extract_table(driver, table_xpath):
+    """Returns (headers, rows) of the table at table_xpath as lists of cell text.
+    Rows with no text in any cell are dropped."""
+    result = driver.execute_script(table_script, table_xpath)
+    if result is None:
+        raise ValueError(f"No table found at {table_xpath}")
+    headers, rows = result
+    return headers, [row for row in rows if any(cell for cell in row)]
+
+
+def extract_outer_html(driver, css_selector):
+    """Returns the outerHTML of every element matching css_selector wrapped in a
+    single <div>, so only the part of the page we parse leaves the browser."""
+    fragments = driver.execute_script(outer_html_script, css_selector)
+    return "<div>" + "".join(fragments) + "</div>"
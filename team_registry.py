@@ -0,0 +1,140 @@
+# Every team gets one integer id, its position in team_codes, and every
+# spelling the sources use maps to it: Basketball Reference codes, DraftKings
+# team names and the FantasyPros prefixes. Names are resolved once when data
+# comes in, after that the feature engine and defense table arrays are indexed
+# by id. The scraper caches and the game log store stay keyed by the Basketball
+# Reference code, the spelling of the pages and URLs they come from. Ids are
+# positions in team_codes, so they are never written to disk.
+
+# Basketball Reference codes, the canonical spelling
+team_codes = [
+    "ATL",
+    "BOS",
+    "BRK",
+    "CHO",
+    "CHI",
+    "CLE",
+    "DAL",
+    "DEN",
+    "DET",
+    "GSW",
+    "HOU",
+    "IND",
+    "LAC",
+    "LAL",
+    "MEM",
+    "MIA",
+    "MIL",
+    "MIN",
+    "NOP",
+    "NYK",
+    "OKC",
+    "ORL",
+    "PHI",
+    "PHO",
+    "POR",
+    "SAC",
+    "SAS",
+    "TOR",
+    "UTA",
+    "WAS",
+]
+
+# DraftKings "Teams" column names
+draftkings_names = {
+    "ATL Hawks": "ATL",
+    "BOS Celtics": "BOS",
+    "BKN Nets": "BRK",
+    "CHA Hornets": "CHO",
+    "CHI Bulls": "CHI",
+    "CLE Cavaliers": "CLE",
+    "DAL Mavericks": "DAL",
+    "DEN Nuggets": "DEN",
+    "DET Pistons": "DET",
+    "GS Warriors": "GSW",
+    "HOU Rockets": "HOU",
+    "IND Pacers": "IND",
+    "LA Clippers": "LAC",
+    "LA Lakers": "LAL",
+    "MEM Grizzlies": "MEM",
+    "MIA Heat": "MIA",
+    "MIL Bucks": "MIL",
+    "MIN Timberwolves": "MIN",
+    "NO Pelicans": "NOP",
+    "NY Knicks": "NYK",
+    "OKC Thunder": "OKC",
+    "ORL Magic": "ORL",
+    "PHI 76ers": "PHI",
+    "PHO Suns": "PHO",
+    "POR Trail Blazers": "POR",
+    "SAC Kings": "SAC",
+    "SA Spurs": "SAS",
+    "TOR Raptors": "TOR",
+    "UTA Jazz": "UTA",
+    "WAS Wizards": "WAS",
+}
+
+# FantasyPros and other short spellings that differ from the codes above
+other_spellings = {
+    "UTH": "UTA",
+    "CHA": "CHO",
+    "BKR": "BRK",
+    "BKN": "BRK",
+    "NOR": "NOP",
+    "NO": "NOP",
+    "GS": "GSW",
+    "SA": "SAS",
+    "NY": "NYK",
+    "PHX": "PHO",
+    "WSH": "WAS",
+    "UTAH": "UTA",
+}
+
+team_ids = {code: team_id for team_id, code in enumerate(team_codes)}
+for spellings in (draftkings_names, other_spellings):
+    for spelling, code in spellings.items():
+        team_ids[spelling.upper()] = team_ids[code]
+
+
+def team_id(name):
+    """Id for a known spelling, None for anything else. Only whole spellings
+    match, a name that merely starts like a team is not guessed at."""
+    if not isinstance(name, str):
+        return None
+    return team_ids.get(name.strip().upper())
+
+
+# Team nicknames as in the DraftKings names, e.g. "Trail Blazers" for POR
+nicknames = {
+    team_ids[code]: name.split(" ", 1)[1].upper()
+    for name, code in draftkings_names.items()
+}
+
+
+def fantasypros_team_id(cell):
+    """Id for a FantasyPros TEAM cell, the team's short code followed by its
+    full name (e.g. "BKN Brooklyn Nets"), or a bare code. The name has to end
+    with the code's nickname, otherwise the cell is unknown and None."""
+    team = team_id(cell)
+    if team is not None or not isinstance(cell, str):
+        return team
+    cell = cell.strip()
+    for length in (3, 2):
+        team = team_id(cell[:length])
+        if team is not None and cell.upper().endswith(" " + nicknames[team]):
+            return team
+    return None
+
+
+def team_code(team_id):
+    """Basketball Reference code for an id, None for None."""
+    return None if team_id is None else team_codes[team_id]
+
+
+def game_team_ids(game):
+    """(home, away) ids for a DraftKings "Home @ Away" game, None for a side
+    that is unknown or when the game cannot be split."""
+    if not isinstance(game, str) or " @ " not in game:
+        return None, None
+    home, away = game.split(" @ ", 1)
+    return team_id(home), team_id(away)
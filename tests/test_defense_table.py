@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from defense_table import DefenseTable, periods, positions, stats
+from team_registry import team_id
+
+pts_reb_ast = [stats.index(stat) for stat in ["PTS", "REB", "AST"]]
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["TEAM", "PTS", "REB", "AST"])
+
+
+@pytest.fixture
+def table():
+    table = DefenseTable()
+    # No Last7 table for point guards, Denver missing from every table
+    table.add_position(
+        "PG",
+        {
+            "Season": frame(
+                [
+                    ["BOS", "20.5", "5.0", "4.5"],
+                    ["UTH", "22.0", "6.0", "5.0"],
+                    ["LAL", "-", "4.0", "6.0"],
+                    ["MIA", "-", "-", "-"],
+                    ["BOS", "99", "99", "99"],
+                ]
+            ),
+            "Last15": frame([["BOS", "21.0", "5.5", "4.0"]]),
+        },
+    )
+    return table
+
+
+def test_lookup_sums_the_stats_per_period(table):
+    assert table.lookup(team_id("BOS"), "PG", pts_reb_ast) == {
+        "Season": pytest.approx(30.0),
+        "Last15": pytest.approx(30.5),
+    }
+
+
+def test_first_row_for_a_team_wins(table):
+    assert table.lookup(team_id("BOS"), "PG", [stats.index("PTS")])[
+        "Season"
+    ] == pytest.approx(20.5)
+
+
+def test_fantasypros_spelling_resolves(table):
+    assert table.lookup(team_id("UTA"), "PG", pts_reb_ast)["Season"] == 33.0
+
+
+def test_missing_period_is_left_out(table):
+    assert "Last7" not in table.lookup(team_id("BOS"), "PG", pts_reb_ast)
+
+
+def test_missing_team_has_no_periods(table):
+    assert table.lookup(team_id("DEN"), "PG", pts_reb_ast) == {}
+
+
+def test_unknown_team_or_position_has_no_periods(table):
+    assert table.lookup(team_id("Nowhere"), "PG", pts_reb_ast) == {}
+    assert table.lookup(team_id("BOS"), "G-F", pts_reb_ast) == {}
+    assert table.lookup(team_id("BOS"), "SG", pts_reb_ast) == {}
+
+
+def test_dash_cells_count_as_zero(table):
+    assert table.lookup(team_id("LAL"), "PG", pts_reb_ast)["Season"] == 10.0
+    assert table.lookup(team_id("LAL"), "PG", [stats.index("PTS")])["Season"] == 0.0
+    # A row of dashes is still present, with a sum of 0
+    assert table.lookup(team_id("MIA"), "PG", pts_reb_ast) == {"Season": 0.0}
+
+
+def test_gather_matches_lookup(table):
+    teams = ["BOS", "DEN", "LAL", "MIA", "UTA"]
+    team_ids = [team_id(team) for team in teams] + [-1]
+    position_ids = [positions.index("PG")] * len(teams) + [0]
+    gathered = table.gather(team_ids, position_ids, pts_reb_ast)
+    assert gathered.shape == (len(team_ids), len(periods))
+    for row, team in enumerate(teams):
+        found = table.lookup(team_id(team), "PG", pts_reb_ast)
+        for column, period in enumerate(periods):
+            if period in found:
+                assert gathered[row, column] == pytest.approx(found[period])
+            else:
+                assert np.isnan(gathered[row, column])
+    assert np.isnan(gathered[-1]).all()
+
+
+def test_gather_with_unknown_position(table):
+    gathered = table.gather([team_id("BOS")], [-1], pts_reb_ast)
+    assert np.isnan(gathered).all()
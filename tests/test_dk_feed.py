@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import http_client
+from DKbetscraper import DraftKingsScraper, feed_categories
+from fixture_server import FixtureServer, ServerTransport
+
+feed_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "TestFolder",
+    "dk_feed",
+)
+event_group = "sites/US-SB/api/v5/eventgroups/42648"
+columns = ["Teams", "Player Name", "O/U", "Odds for Over", "Odds for Under"]
+
+
+def payload_path(directory, category_id, subcategory_id):
+    return os.path.join(
+        directory,
+        event_group,
+        "categories",
+        str(category_id),
+        "subcategories",
+        str(subcategory_id),
+    )
+
+
+def expected_rows(directory, stat_type):
+    # The rows read straight from the saved payload, one per offer
+    with open(payload_path(directory, *feed_categories[stat_type])) as file:
+        payload = json.load(file)["eventGroup"]
+    events = {event["eventId"]: event["name"] for event in payload["events"]}
+    rows = []
+    for category in payload["offerCategories"]:
+        for descriptor in category["offerSubcategoryDescriptors"]:
+            for group in descriptor["offerSubcategory"]["offers"]:
+                for offer in group:
+                    over, under = offer["outcomes"]
+                    rows.append(
+                        [
+                            events[offer["eventId"]],
+                            over["participant"],
+                            str(over["line"]),
+                            over["oddsAmerican"],
+                            under["oddsAmerican"],
+                        ]
+                    )
+    return rows
+
+
+def scrape_feed_tables(directory):
+    with FixtureServer(str(directory)) as server:
+        http_client.set_transport(ServerTransport(server.url))
+        try:
+            scraper = DraftKingsScraper(mode="feed")
+            odds_data = scraper.scrape_odds()
+        finally:
+            http_client.set_transport(None)
+    return odds_data, scraper.create_data_table(odds_data)
+
+
+def test_feed_mode_reads_every_category(tmp_path):
+    directory = tmp_path / "dk_feed"
+    shutil.copytree(feed_dir, directory)
+    # A category the feed does not answer
+    os.remove(payload_path(directory, *feed_categories["R"]))
+    odds_data, tables = scrape_feed_tables(directory)
+
+    assert sorted(tables) == sorted(feed_categories)
+    assert odds_data["R"] == []
+    assert tables["R"].empty
+    for stat_type in feed_categories:
+        if stat_type == "R":
+            continue
+        df = tables[stat_type]
+        assert list(df.columns) == columns
+        rows = expected_rows(feed_dir, stat_type)
+        assert rows
+        assert sorted(df.values.tolist()) == sorted(rows)
+        # Grouped per event, like the page's accordions
+        for game in odds_data[stat_type]:
+            assert len({row["Teams"] for row in game}) == 1
@@ -0,0 +1,308 @@
+import random
+import statistics as st
+import numpy as np
+import pandas as pd
+import pytest
+from data_structure import PlayerPerformanceAnalyzer
+from defense_table import DefenseTable
+from feature_engine import FeatureEngine, feature_columns
+from team_registry import draftkings_names, team_id
+
+# The feature engine has to give the same numbers as applying add_new_columns
+# row by row, the reference implementation, including the rows where it stops
+# part way through. Both run over randomized slates from fake scrapers.
+
+team_codes = sorted(set(draftkings_names.values()))
+draftkings_teams = sorted(draftkings_names)
+stat_types = ["PRA", "PR", "PA", "P", "R", "A", "X"]
+
+
+class FakeStatsScraper:
+    def __init__(self, rng):
+        self.player_stats_cache = {}
+        for number in range(60):
+            if number % 17 == 0:
+                # Not found on basketball-reference
+                self.player_stats_cache[f"p{number}"] = []
+                continue
+            count = rng.choice([0, 1, 3, 7, 12, 40, 70])
+            games = [
+                (rng.randint(0, 40), rng.randint(0, 15), rng.randint(0, 12))
+                for _ in range(count)
+            ]
+            minutes = [
+                round(rng.uniform(0, 40), 4)
+                for _ in range(max(0, count - rng.randint(0, 3)))
+            ]
+            self.player_stats_cache[f"p{number}"] = [
+                games,
+                rng.choice(team_codes + ["Free Agent"]),
+                rng.choice(["PG", "SG", "C", "Unknown"]),
+                minutes,
+            ]
+
+    def fetch_player_stats(self, player_name):
+        self.player_stats_cache.setdefault(player_name, [])
+
+    def return_Cache_value(self, player_name):
+        return self.player_stats_cache[player_name]
+
+
+class FakeTeamScraper:
+    def __init__(self, rng):
+        self.team_stats_cash = {
+            code: [rng.randint(0, 1) for _ in range(rng.choice([0, 3, 20, 60]))]
+            for code in team_codes
+            if code != "MIA"
+        }
+        self.position_stats = {
+            position: {
+                period: self.defense_frame(rng)
+                for period in ["Season", "Last7", "Last15"]
+            }
+            for position in ["PG", "SG", "C"]
+        }
+        del self.position_stats["C"]["Last7"]
+        self.position_stats["SG"]["Season"].loc[3, "PTS"] = "x"
+        self.position_stats["SG"]["Season"].loc[4, ["PTS", "REB", "AST"]] = "-"
+        self.defense_table = DefenseTable()
+        for position, frames in self.position_stats.items():
+            self.defense_table.add_position(position, frames)
+
+    def defense_frame(self, rng):
+        # FantasyPros spells Utah UTH, and Denver is missing
+        teams = [
+            code if code != "UTA" else "UTH" for code in team_codes if code != "DEN"
+        ]
+        return pd.DataFrame(
+            {
+                "TEAM": teams,
+                "PTS": [str(rng.uniform(10, 30)) for _ in teams],
+                "REB": [str(rng.uniform(3, 12)) for _ in teams],
+                "AST": [str(rng.uniform(1, 9)) for _ in teams],
+            }
+        )
+
+    def find_team_record(self, team):
+        pass
+
+    def return_cache_value(self, team):
+        return self.team_stats_cash[team]
+
+    def find_position_opponent_stats(self, position):
+        pass
+
+    def return_defensive_cache(self, position):
+        return self.position_stats[position]
+
+
+def make_slate(rng):
+    players = [f"p{number}" for number in range(62)] + ["N/A"]
+    frames = {}
+    for stat_type in stat_types:
+        frames[stat_type] = pd.DataFrame(
+            [
+                {
+                    "Player Name": rng.choice(players),
+                    "O/U": rng.choice([str(rng.randint(0, 50) + 0.5), "5", "bad"]),
+                    "Teams": rng.choice(
+                        [
+                            f"{rng.choice(draftkings_teams)} @ {rng.choice(draftkings_teams)}",
+                            None,
+                            "Nowhere @ BOS Celtics",
+                        ]
+                    ),
+                }
+                for _ in range(300)
+            ]
+        )
+    # Sheets that went through fetch_player_yearly_data already have the columns
+    for stat_type in ("PR", "A"):
+        for column in feature_columns:
+            frames[stat_type][column] = "" if column in ("Position", "Team") else 0.0
+    return frames
+
+
+def make_analyzer(rng):
+    analyzer = PlayerPerformanceAnalyzer.__new__(PlayerPerformanceAnalyzer)
+    analyzer.stats_Scraper = FakeStatsScraper(rng)
+    analyzer.team_Scraper = FakeTeamScraper(rng)
+    analyzer.feature_engine = None
+    analyzer.extra_windows = ()
+    return analyzer
+
+
+def same(expected, actual):
+    if pd.isna(expected) and pd.isna(actual):
+        return True
+    return expected == actual
+
+
+def assert_engine_matches(analyzer, frames):
+    analyzer.df = frames
+    engine = FeatureEngine(analyzer).load(frames)
+    for stat_type, df in frames.items():
+        expected = df.apply(
+            lambda row: analyzer.add_new_columns(row.copy(), stat_type), axis=1
+        )
+        actual = engine.add_features(df, stat_type)
+        columns = [column for column in feature_columns if column in expected]
+        assert columns == [column for column in feature_columns if column in actual]
+        for column in columns:
+            mismatched = [
+                (index, x, y)
+                for index, x, y in zip(expected.index, expected[column], actual[column])
+                if not same(x, y)
+            ]
+            assert not mismatched, (stat_type, column, mismatched[:5])
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_engine_matches_add_new_columns(seed, capsys):
+    rng = random.Random(seed)
+    assert_engine_matches(make_analyzer(rng), make_slate(rng))
+
+
+class FailingStatsScraper(FakeStatsScraper):
+    def fetch_player_stats(self, player_name):
+        if player_name in ("p3", "p8"):
+            raise ConnectionError(f"{player_name} failed after retries")
+        super().fetch_player_stats(player_name)
+
+
+class FailingTeamScraper(FakeTeamScraper):
+    def find_team_record(self, team):
+        if team in ("BOS", "LAL"):
+            raise ValueError("Document is empty")
+
+
+def test_scrape_errors_are_contained_to_their_rows(capsys):
+    rng = random.Random(11)
+    analyzer = make_analyzer(rng)
+    analyzer.stats_Scraper = FailingStatsScraper(rng)
+    analyzer.team_Scraper = FailingTeamScraper(rng)
+    frames = make_slate(rng)
+    assert_engine_matches(analyzer, frames)
+    engine = FeatureEngine(analyzer).load(frames)
+    assert "p3" not in engine.player_rows
+    assert np.isnan(engine.win_percentages(np.array([team_id("BOS")]))).all()
+    assert "Document is empty" in capsys.readouterr().out
+
+
+def test_extra_windows_leave_the_default_columns_alone(capsys):
+    rng = random.Random(7)
+    analyzer = make_analyzer(rng)
+    frames = make_slate(rng)
+    base = FeatureEngine(analyzer).load(frames).add_features(frames["PA"], "PA")
+    extended = FeatureEngine(analyzer, extra_windows=(3, 15)).load(frames)
+    result = extended.add_features(frames["PA"], "PA")
+    assert result[base.columns].equals(base)
+    rows = result[result["Last 15 Games Over Covered %"].notna()]
+    assert len(rows)
+    for _, row in rows.iterrows():
+        games = analyzer.stats_Scraper.player_stats_cache[row["Player Name"]][0][-15:]
+        totals = [pts + ast for pts, _, ast in games]
+        over = sum(total > float(row["O/U"]) for total in totals)
+        expected = over / len(totals) * 100 if totals else -99
+        assert row["Last 15 Games Over Covered %"] == expected
+
+
+class StaticStatsScraper(FakeStatsScraper):
+    def __init__(self, player_stats):
+        self.player_stats_cache = dict(player_stats)
+
+
+class StaticTeamScraper(FakeTeamScraper):
+    def __init__(self, records):
+        self.team_stats_cash = dict(records)
+        self.defense_table = DefenseTable()
+
+
+def summary_engine():
+    analyzer = PlayerPerformanceAnalyzer.__new__(PlayerPerformanceAnalyzer)
+    games = [(pts, 5, 2) for pts in range(1, 13)]
+    analyzer.stats_Scraper = StaticStatsScraper(
+        {
+            "twelve": [games, "BOS", "PG", [30.0] * 6 + [20.0] * 6],
+            "three": [games[:3], "LAL", "C", [10.0, 20.0, 40.0]],
+            "no minutes": [games[:4], "BOS", "SG", []],
+            "no games": [[], "Free Agent", "Unknown", []],
+            "not found": [],
+        }
+    )
+    analyzer.team_Scraper = StaticTeamScraper({"BOS": [1, 0, 1, 1], "LAL": []})
+    frames = {
+        "P": pd.DataFrame(
+            {
+                "Player Name": list(analyzer.stats_Scraper.player_stats_cache),
+                "Teams": None,
+            }
+        )
+    }
+    return FeatureEngine(analyzer).load(frames)
+
+
+def player_arrays(engine, player_name):
+    # The per window games, PTS/TRB/AST totals and minute means add_features
+    # gathers for the player's rows
+    row = engine.player_rows[player_name]
+    return (
+        engine.window_games[row].tolist(),
+        engine.window_totals[row],
+        engine.minute_means[row],
+    )
+
+
+def test_player_windows():
+    engine = summary_engine()
+    row = engine.player_rows["twelve"]
+    assert (engine.player_teams[row], engine.player_positions[row]) == ("BOS", "PG")
+    games, totals, minutes = player_arrays(engine, "twelve")
+    # Season, last 10 and last 5
+    assert games == [12, 10, 5]
+    assert totals[:, 0].tolist() == [78, 75, 50]
+    assert totals[:, 1].tolist() == [60, 50, 25]
+    assert minutes.tolist() == [25.0, 24.0, 20.0]
+
+
+def test_window_longer_than_the_season():
+    games, totals, minutes = player_arrays(summary_engine(), "three")
+    assert games == [3, 3, 3]
+    assert totals[:, 0].tolist() == [6, 6, 6]
+    assert minutes.tolist() == [pytest.approx(70 / 3)] * 3
+
+
+def test_empty_minutes_list_leaves_minutes_unset():
+    games, _, minutes = player_arrays(summary_engine(), "no minutes")
+    assert games == [4, 4, 4]
+    assert np.isnan(minutes).all()
+
+
+def test_player_without_games():
+    engine = summary_engine()
+    games, totals, minutes = player_arrays(engine, "no games")
+    assert games == [0, 0, 0]
+    assert totals.sum() == 0
+    assert np.isnan(minutes).all()
+    _, means = engine.combined_stats("PRA")
+    assert np.isnan(means[engine.player_rows["no games"]]).all()
+    assert "not found" not in engine.player_rows
+
+
+def test_team_win_percentages():
+    engine = summary_engine()
+    teams = np.array([team_id("BOS"), team_id("LAL"), -1])
+    assert engine.team_games[team_id("BOS")].tolist() == [4, 4, 4]
+    rates = engine.win_percentages(teams)
+    assert rates[0].tolist() == [0.75, 0.75, 0.75]
+    # A team without games and an id that is not a team have no win rate
+    assert np.isnan(rates[1:]).all()
+
+
+def test_combined_means_match_statistics_mean():
+    engine = summary_engine()
+    _, means = engine.combined_stats("PA")
+    games = engine.stats_scraper.player_stats_cache["twelve"][0]
+    totals = [pts + ast for pts, _, ast in games]
+    expected = [st.mean(totals), st.mean(totals[-10:]), st.mean(totals[-5:])]
+    assert means[engine.player_rows["twelve"]].tolist() == expected
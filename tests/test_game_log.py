@@ -0,0 +1,27 @@
+from game_log import GameLog, GameRow
+
+
+def make_log(*dates):
+    games = [GameRow(date, "BOS", "NYK", 20, 5, 4, 30.0) for date in dates]
+    return GameLog("Jayson Tatum", "BOS", "SF", games)
+
+
+def test_stats_for_the_slate_date():
+    log = make_log("2024-01-12", "2024-01-14")
+    assert log.stats_on("2024-01-14") == [20.0, 5.0, 4.0]
+
+
+def test_player_who_sat_out_the_slate_is_not_graded():
+    log = make_log("2024-01-12", "2024-01-14")
+    assert log.stats_on("2024-01-15") is None
+
+
+def test_empty_game_log_is_not_graded():
+    assert make_log().stats_on("2024-01-15") is None
+
+
+def test_slate_game_behind_later_games_is_graded():
+    # Graded a day late, or an older game_date passed in
+    log = make_log("2024-01-12", "2024-01-14", "2024-01-16")
+    assert log.stats_on("2024-01-14") == [20.0, 5.0, 4.0]
+    assert log.stats_on("2024-01-13") is None
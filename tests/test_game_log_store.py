@@ -0,0 +1,48 @@
+from game_log import GameLog, GameRow
+from game_log_store import GameLogStore
+
+
+def make_log(played, listed_through, name="Jayson Tatum", pts=20):
+    games = [GameRow(date, "BOS", "NYK", pts, 5, 4, 30.0) for date in played]
+    return GameLog(name, "BOS", "SF", games, listed_through)
+
+
+def test_unknown_player_needs_sync(tmp_path):
+    store = GameLogStore(str(tmp_path / "logs.sqlite"))
+    assert store.needs_sync("tatumja01", 2024, {"BOS": "2024-01-14"})
+
+
+def test_log_is_stale_once_the_team_plays_again(tmp_path):
+    store = GameLogStore(str(tmp_path / "logs.sqlite"))
+    store.append(
+        make_log(["2024-01-12", "2024-01-14"], "2024-01-14"), 2024, "tatumja01"
+    )
+    # Morning run, last night's game is in the log
+    assert not store.needs_sync("tatumja01", 2024, {"BOS": "2024-01-14"})
+    # Same day, after tonight's game is final
+    assert store.needs_sync("tatumja01", 2024, {"BOS": "2024-01-15"})
+
+
+def test_player_who_sat_out_is_not_refetched(tmp_path):
+    store = GameLogStore(str(tmp_path / "logs.sqlite"))
+    store.append(make_log(["2024-01-12"], "2024-01-14"), 2024, "tatumja01")
+    assert not store.needs_sync("tatumja01", 2024, {"BOS": "2024-01-14"})
+    assert store.load("tatumja01", 2024).games[-1].date == "2024-01-12"
+
+
+def test_without_team_dates_the_log_is_synced(tmp_path):
+    store = GameLogStore(str(tmp_path / "logs.sqlite"))
+    store.append(make_log(["2024-01-14"], "2024-01-14"), 2024, "tatumja01")
+    assert store.needs_sync("tatumja01", 2024, {})
+
+
+def test_players_sharing_a_name_keep_separate_rows(tmp_path):
+    store = GameLogStore(str(tmp_path / "logs.sqlite"))
+    store.append(
+        make_log(["2024-01-14"], "2024-01-14", "Jalen Williams", 10), 2024, "willija06"
+    )
+    store.append(
+        make_log(["2024-01-14"], "2024-01-14", "Jalen Williams", 30), 2024, "willija07"
+    )
+    assert store.load("willija06", 2024).games[0].pts == 10
+    assert store.load("willija07", 2024).games[0].pts == 30
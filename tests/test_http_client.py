@@ -0,0 +1,61 @@
+import pytest
+import requests
+import http_client
+from rate_limiter import TokenBucket
+
+
+def open_breaker(url):
+    # Past the threshold with the cooldown over, so the next call is the trial
+    breaker = http_client.breaker_for_url(url)
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_until = 0.0
+    return breaker
+
+
+def fetch_with(transport, url):
+    http_client.set_transport(transport)
+    try:
+        return http_client.fetch_page(url, use_cache=False, max_attempts=1)
+    finally:
+        http_client.set_transport(None)
+
+
+def raise_error(error):
+    def transport(url, timeout=10):
+        raise error
+
+    return transport
+
+
+def test_request_exception_during_trial_counts_as_failure():
+    url = "http://breaker-redirects.test/page"
+    breaker = open_breaker(url)
+    with pytest.raises(requests.TooManyRedirects):
+        fetch_with(raise_error(requests.TooManyRedirects("loop")), url)
+    assert not breaker.trial_running
+    assert breaker.failures == breaker.failure_threshold + 1
+
+
+def test_unexpected_exception_during_trial_ends_the_trial():
+    url = "http://breaker-other.test/page"
+    breaker = open_breaker(url)
+    with pytest.raises(ValueError):
+        fetch_with(raise_error(ValueError("bad page")), url)
+    assert not breaker.trial_running
+    assert breaker.allow()
+
+
+def test_callers_queued_behind_a_pause_are_staggered():
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    bucket.pause(1.0)
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits[0] == pytest.approx(1.0, abs=0.05)
+    assert waits[1] - waits[0] == pytest.approx(0.1, abs=0.01)
+    assert waits[2] - waits[1] == pytest.approx(0.1, abs=0.01)
+
+
+def test_bucket_without_pause_does_not_wait_within_capacity():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() > 0
@@ -0,0 +1,34 @@
+import glob
+import os
+import pytest
+import parse_benchmark
+
+pages_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TestFolder", "pages"
+)
+
+
+def fixture_pages(page_type):
+    return sorted(glob.glob(os.path.join(pages_dir, f"{page_type}_*.html")))
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("page_type", sorted(parse_benchmark.parsers))
+def test_lxml_parsers_match_beautifulsoup(page_type):
+    legacy, fast = parse_benchmark.parsers[page_type]
+    paths = fixture_pages(page_type)
+    assert paths, f"no {page_type} fixture pages in {pages_dir}"
+    for path in paths:
+        with open(path, "rb") as file:
+            content = file.read()
+        assert fast(content) == legacy(content), path
+
+
+def test_dk_rows_carry_lines_and_odds():
+    with open(os.path.join(pages_dir, "dk_player_points.html"), "rb") as file:
+        rows = parse_benchmark.fast_dk(file.read())
+    jokic = [row for row in rows if row[1] == "Nikola Jokic"]
+    assert len(jokic) == 1
+    teams, _, line, odds_over, odds_under = jokic[0]
+    assert teams == "DEN Nuggets @ LA Lakers"
+    assert line.endswith(".5") and odds_over != "N/A" and odds_under != "N/A"
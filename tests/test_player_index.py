@@ -0,0 +1,47 @@
+from player_index import PlayerIndex
+
+
+def make_index(tmp_path, names):
+    index = PlayerIndex(path=str(tmp_path / "index.json"), aliases_path=None)
+    index.loaded = True
+    for name, player_id in names.items():
+        index.add(name, player_id)
+    return index
+
+
+def test_suffix_dropped_when_only_one_player_has_the_name(tmp_path):
+    index = make_index(tmp_path, {"Jaren Jackson Jr.": "jacksja02"})
+    assert index.lookup("Jaren Jackson") == "jacksja02"
+    assert index.lookup("Jaren Jackson Jr.") == "jacksja02"
+
+
+def test_suffix_kept_when_two_players_share_the_name(tmp_path):
+    index = make_index(
+        tmp_path, {"Gary Payton": "paytoga01", "Gary Payton II": "paytoga02"}
+    )
+    assert index.lookup("Gary Payton") == "paytoga01"
+    assert index.lookup("Gary Payton II") == "paytoga02"
+
+
+def test_ambiguous_name_without_suffix_is_a_miss(tmp_path):
+    index = make_index(
+        tmp_path, {"Tim Hardaway Jr.": "hardati02", "Tim Hardaway Sr.": "hardati01"}
+    )
+    assert index.lookup("Tim Hardaway") is None
+
+
+def test_fuzzy_match_accepts_a_clear_winner(tmp_path):
+    index = make_index(tmp_path, {"Nikola Jokic": "jokicni01"})
+    assert index.lookup("Nikola Jokicc") == "jokicni01"
+
+
+def test_fuzzy_match_rejects_close_runner_up(tmp_path):
+    index = make_index(
+        tmp_path, {"Jalen Williams": "willija06", "Jaylin Williams": "willija07"}
+    )
+    assert index.lookup("Jaylen Williams") is None
+
+
+def test_name_missing_from_listing_is_a_miss(tmp_path):
+    index = make_index(tmp_path, {"Jalen Williams": "willija06"})
+    assert index.lookup("Cody Williams") is None
@@ -0,0 +1,111 @@
+import os
+import http_client
+import player_index
+import rate_limiter
+import response_cache
+from fixture_server import FaultInjector, replaying
+from game_log_store import GameLogStore
+from NBAReferenceScraper import PlayerStatsScraper
+from page_parsers import parse_game_log_page
+from player_index import gamelog_url
+
+replay_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TestFolder", "replay"
+)
+gamelog_path = os.path.join(
+    replay_dir, "www.basketball-reference.com/players/j/jokicni01/gamelog/2024"
+)
+
+
+class CountingTransport:
+    def __init__(self, transport):
+        self.transport = transport
+        self.urls = []
+
+    def __call__(self, url, timeout=10):
+        self.urls.append(url)
+        return self.transport(url, timeout=timeout)
+
+
+def replay_scraper(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        player_index,
+        "shared_index",
+        player_index.PlayerIndex(path=str(tmp_path / "index.json"), aliases_path=None),
+    )
+    return PlayerStatsScraper(store=GameLogStore(str(tmp_path / "logs.sqlite")))
+
+
+def test_replayed_game_log_builds_player_stats(tmp_path, monkeypatch):
+    with open(gamelog_path, "rb") as file:
+        rows, _, _ = parse_game_log_page(file.read())
+    played = [row for row in rows if "pts" in row]
+    limits = dict(rate_limiter.host_limits)
+
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = replay_scraper(tmp_path, monkeypatch)
+        scraper.fetch_player_stats("Nikola Jokic")
+    games, team, position, minutes = scraper.return_Cache_value("Nikola Jokic")
+
+    assert (team, position) == ("DEN", "C")
+    assert len(games) == len(played)
+    assert games[-1] == (
+        int(played[-1]["pts"]),
+        int(played[-1]["trb"]),
+        int(played[-1]["ast"] or 0),
+    )
+    assert len(minutes) == len(played)
+    # uninstall put the live transport and rate limits back
+    assert http_client.transport is None
+    assert rate_limiter.host_limits == limits
+
+
+def test_current_stored_log_is_not_downloaded_again(tmp_path, monkeypatch):
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = replay_scraper(tmp_path, monkeypatch)
+        scraper.fetch_player_stats("Nikola Jokic")
+        with open(gamelog_path, "rb") as file:
+            rows, _, _ = parse_game_log_page(file.read())
+        last_listed = max(row.get("date_game", "").strip() for row in rows)
+        counting = CountingTransport(http_client.transport)
+        http_client.set_transport(counting)
+        rerun = PlayerStatsScraper(store=scraper.store)
+        rerun.team_last_game = {"DEN": last_listed}
+        rerun.fetch_player_stats("Nikola Jokic")
+        assert counting.urls == []
+        assert rerun.return_Cache_value("Nikola Jokic")[1] == "DEN"
+
+
+def test_player_missing_from_fixtures_is_left_empty(tmp_path, monkeypatch):
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = replay_scraper(tmp_path, monkeypatch)
+        scraper.fetch_player_stats("Nobody Real")
+    assert scraper.return_Cache_value("Nobody Real") == []
+
+
+def test_out_of_date_log_skips_the_response_cache(tmp_path, monkeypatch):
+    url = gamelog_url("jokicni01", 2024)
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        # A page cached earlier in the day, before the latest games
+        response_cache.get_shared_cache().set(url, b"<html></html>")
+        scraper = replay_scraper(tmp_path, monkeypatch)
+        scraper.fetch_player_stats("Nikola Jokic")
+        assert response_cache.get_shared_cache().get(url) == b"<html></html>"
+    games, team, _, _ = scraper.return_Cache_value("Nikola Jokic")
+    assert team == "DEN" and games
+
+
+def test_replay_faults_leave_the_live_breakers_and_budget_alone(tmp_path):
+    url = "https://www.basketball-reference.com/leagues/NBA_2020_games.html"
+    live_breakers = dict(http_client.breakers)
+    live_budget = http_client.retry_budget
+    retries = live_budget.retries
+    faults = FaultInjector(error_rate=1.0, seed=1)
+    with replaying(replay_dir, faults, cache_path=str(tmp_path / "cache.sqlite")):
+        for _ in range(6):
+            http_client.fetch_page(url, use_cache=False, max_attempts=2)
+        assert not http_client.breaker_for_url(url).allow()
+    assert http_client.breakers == live_breakers
+    assert http_client.retry_budget is live_budget
+    assert live_budget.retries == retries
+    assert http_client.breaker_for_url(url).allow()
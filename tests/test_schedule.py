@@ -0,0 +1,95 @@
+import os
+import shutil
+import game_log_store
+from backfill import Backfill
+from ESPNScraper import EspnScraper
+from fixture_server import replaying
+from game_log_store import GameLogStore
+from page_parsers import parse_team_results
+
+replay_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TestFolder", "replay"
+)
+pages_dir = os.path.join(os.path.dirname(replay_dir), "pages")
+leagues = "www.basketball-reference.com/leagues"
+
+
+def bubble_schedule(tmp_path):
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = EspnScraper(season=2020, store=GameLogStore(str(tmp_path / "s.db")))
+        return scraper.fetch_league_schedule(2020)
+
+
+def test_months_come_from_the_season_page(tmp_path):
+    team_games, complete = bubble_schedule(tmp_path)
+    dates = sorted(date for games in team_games.values() for date, _, _ in games)
+    assert complete
+    # Ten month pages of three games, two teams per game
+    assert sum(len(games) for games in team_games.values()) == 60
+    assert dates[0].startswith("2019-10")
+    assert dates[-1].startswith("2020-10")
+    assert any(date.startswith("2020-08") for date in dates)
+
+
+def run_schedule_backfill(tmp_path, monkeypatch, directory):
+    monkeypatch.setattr(
+        game_log_store, "shared_store", GameLogStore(str(tmp_path / "logs.sqlite"))
+    )
+    with replaying(directory, cache_path=str(tmp_path / "cache.sqlite")):
+        backfill = Backfill([2020], str(tmp_path / "checkpoint.json"))
+        backfill.backfill_schedule(2020)
+    return backfill
+
+
+def test_complete_schedule_is_checkpointed(tmp_path, monkeypatch):
+    backfill = run_schedule_backfill(tmp_path, monkeypatch, replay_dir)
+    assert backfill.checkpoint.done("schedule:2020")
+
+
+def test_missing_month_leaves_the_checkpoint_unset(tmp_path, monkeypatch, capsys):
+    directory = replay_without(tmp_path, "NBA_2020_games-july.html")
+    backfill = run_schedule_backfill(tmp_path, monkeypatch, str(directory))
+    assert not backfill.checkpoint.done("schedule:2020")
+    assert "NBA_2020_games-july.html" in capsys.readouterr().out
+    # The months that were read are still stored
+    stored = backfill.store.load_team_games("LAL", 2020)
+    assert stored and not any(date.startswith("2020-07") for date, _, _ in stored)
+
+
+def replay_without(tmp_path, month):
+    directory = tmp_path / "replay"
+    shutil.copytree(replay_dir, directory)
+    os.remove(directory / leagues / month)
+    return directory
+
+
+def test_complete_schedule_fills_the_team_caches(tmp_path):
+    with replaying(replay_dir, cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = EspnScraper(season=2020, store=GameLogStore(str(tmp_path / "s.db")))
+        scraper.find_team_record("LAL")
+    team_games, _ = bubble_schedule(tmp_path)
+    assert scraper.league_schedule_loaded
+    assert scraper.team_stats_cash["LAL"] == [won for _, _, won in team_games["LAL"]]
+    assert scraper.last_game_dates()["LAL"] == team_games["LAL"][-1][0]
+
+
+def test_incomplete_schedule_falls_back_to_team_pages(tmp_path):
+    directory = replay_without(tmp_path, "NBA_2020_games-october-2020.html")
+    team_page = directory / "www.basketball-reference.com/teams/BOS/2020_games.html"
+    team_page.parent.mkdir(parents=True)
+    shutil.copy(
+        os.path.join(pages_dir, "team_games_teams_DEN_2024_games_html.html"),
+        team_page,
+    )
+    with open(team_page, "rb") as file:
+        expected = parse_team_results(file.read())
+    with replaying(str(directory), cache_path=str(tmp_path / "cache.sqlite")):
+        scraper = EspnScraper(season=2020, store=GameLogStore(str(tmp_path / "s.db")))
+        scraper.find_team_record("BOS")
+        scraper.find_team_record("LAL")
+    assert not scraper.league_schedule_loaded
+    # BOS from its own page, LAL has no page in the fixtures
+    assert scraper.team_stats_cash == {"BOS": expected}
+    # No last game dates, so every stored game log is synced
+    assert scraper.last_game_dates() == {}
+    assert scraper.store.load_team_games("BOS", 2020) == []
@@ -0,0 +1,80 @@
+import pytest
+from team_registry import (
+    draftkings_names,
+    fantasypros_team_id,
+    game_team_ids,
+    other_spellings,
+    team_code,
+    team_codes,
+    team_id,
+)
+
+spellings = (
+    [(code, code) for code in team_codes]
+    + list(draftkings_names.items())
+    + list(other_spellings.items())
+)
+
+
+@pytest.mark.parametrize("spelling, code", spellings)
+def test_every_spelling_resolves(spelling, code):
+    assert team_code(team_id(spelling)) == code
+    assert team_code(team_id(f" {spelling.lower()} ")) == code
+    assert team_code(fantasypros_team_id(spelling)) == code
+
+
+def test_every_team_has_one_draftkings_name():
+    assert sorted(draftkings_names.values()) == sorted(team_codes)
+
+
+def test_sources_agree_on_brooklyn_and_charlotte():
+    # FantasyPros BKN/BKR and CHA, DraftKings BKN and CHA, Basketball Reference
+    # BRK and CHO
+    brooklyn = {team_id(name) for name in ["BKN", "BKR", "BKN Nets", "BRK"]}
+    charlotte = {team_id(name) for name in ["CHA", "CHA Hornets", "CHO"]}
+    assert brooklyn == {team_id("BRK")}
+    assert charlotte == {team_id("CHO")}
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["Nowhere", "BOSTON", "LAL Clippers", "GSX", "N", "", "Free Agent", None, 5],
+)
+def test_unknown_names_are_none(name):
+    assert team_id(name) is None
+    assert fantasypros_team_id(name) is None
+    assert team_code(team_id(name)) is None
+
+
+@pytest.mark.parametrize(
+    "cell, code",
+    [
+        ("BKN Brooklyn Nets", "BRK"),
+        ("CHA Charlotte Hornets", "CHO"),
+        ("UTH Utah Jazz", "UTA"),
+        ("NOR New Orleans Pelicans", "NOP"),
+        ("NO New Orleans Pelicans", "NOP"),
+        ("POR Portland Trail Blazers", "POR"),
+        ("LAC LA Clippers", "LAC"),
+    ],
+)
+def test_fantasypros_cells_with_the_full_name(cell, code):
+    assert team_code(fantasypros_team_id(cell)) == code
+    assert team_id(cell) is None
+
+
+@pytest.mark.parametrize(
+    "cell", ["BOS Brooklyn Nets", "LAL LA Clippers", "BOSTON", "BKN Nothing"]
+)
+def test_fantasypros_cells_that_disagree_are_unknown(cell):
+    assert fantasypros_team_id(cell) is None
+
+
+def test_game_team_ids():
+    assert game_team_ids("BKN Nets @ CHA Hornets") == (
+        team_id("BRK"),
+        team_id("CHO"),
+    )
+    assert game_team_ids("Nowhere @ SA Spurs") == (None, team_id("SAS"))
+    assert game_team_ids("BOS Celtics") == (None, None)
+    assert game_team_ids(None) == (None, None)
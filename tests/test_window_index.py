@@ -0,0 +1,71 @@
+import statistics
+import numpy as np
+import pytest
+from window_index import WindowIndex, right_aligned
+
+series = [[5, 1, 9, 3, 7, 2], [4, 8], []]
+
+
+@pytest.fixture
+def index():
+    return WindowIndex(*right_aligned(series))
+
+
+def test_right_aligned_pads_in_front():
+    values, mask = right_aligned(series)
+    assert values.shape == (3, 6)
+    assert values[1].tolist() == [0, 0, 0, 0, 4, 8]
+    assert mask.sum(axis=1).tolist() == [6, 2, 0]
+
+
+def test_right_aligned_with_no_series():
+    values, mask = right_aligned([])
+    assert values.shape == (0, 0) and mask.shape == (0, 0)
+
+
+def test_last_n_mean_matches_statistics_mean(index):
+    rows = np.arange(len(series))
+    for n in (None, 1, 3, 5):
+        expected = [
+            statistics.mean(values if n is None else values[-n:]) if values else np.nan
+            for values in series
+        ]
+        np.testing.assert_array_equal(index.mean(rows, n), expected)
+
+
+def test_window_longer_than_the_series_uses_every_game(index):
+    rows = np.arange(len(series))
+    assert index.count(rows, 10).tolist() == [6, 2, 0]
+    np.testing.assert_array_equal(index.mean(rows, 10), index.mean(rows))
+    assert index.over(rows, [4, 4, 4], 10).tolist() == [3, 1, 0]
+
+
+def test_row_without_games_has_no_mean_and_nothing_over(index):
+    assert np.isnan(index.mean([2])[0])
+    assert index.sum([2], 5).tolist() == [0]
+    assert index.over([2, 2], [-1, 0]).tolist() == [0, 0]
+
+
+def test_over_counts_strictly_above_the_line(index):
+    # Last 3 games of the first row are 3, 7, 2
+    rows = [0, 0, 0, 0]
+    assert index.over(rows, [2, 2.5, 7, 0], 3).tolist() == [2, 2, 0, 3]
+
+
+def test_over_matches_brute_force():
+    rng = np.random.default_rng(3)
+    data = [list(rng.integers(0, 30, rng.integers(0, 40))) for _ in range(50)]
+    index = WindowIndex(*right_aligned(data))
+    rows = rng.integers(0, len(data), 500)
+    lines = rng.integers(0, 30, 500) + rng.choice([0, 0.5], 500)
+    for n in (None, 5, 10, 100):
+        expected = [
+            sum(value > line for value in (data[row] if n is None else data[row][-n:]))
+            for row, line in zip(rows, lines)
+        ]
+        assert index.over(rows, lines, n).tolist() == expected
+
+
+def test_empty_query(index):
+    assert index.over([], [], 5).tolist() == []
+    assert index.mean(np.array([], dtype=int)).tolist() == []
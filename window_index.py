@@ -0,0 +1,78 @@
+import numpy as np
+
+# Last N game queries over many players' or teams' series at once. Series are
+# stored right aligned, so every row's most recent game is in the last column.
+# Cumulative sums answer any last N sum or mean in O(1), and the last N values
+# kept sorted answer "how many games went over this line" with a binary search.
+
+
+def right_aligned(series, item_shape=()):
+    """Stacks sequences of different lengths into a zero padded array whose rows
+    end at the last column, and returns it with the mask of real entries."""
+    lengths = np.array([len(values) for values in series], dtype=int)
+    width = int(lengths.max()) if len(series) else 0
+    array = np.zeros((len(series), width) + item_shape)
+    mask = np.arange(width) >= (width - lengths)[:, None]
+    if lengths.sum():
+        array[mask] = np.concatenate(
+            [
+                np.asarray(values, dtype=float).reshape((-1,) + item_shape)
+                for values in series
+            ]
+        )
+    return array, mask
+
+
+class WindowIndex:
+    """Index over the right aligned rows of values, with mask marking the real
+    entries. n=None means the whole series. Sums of integer stats are exact,
+    so means equal statistics.mean over the same games."""
+
+    def __init__(self, values, mask):
+        self.lengths = mask.sum(axis=1)
+        self.width = values.shape[1]
+        self.values = np.where(mask, values, 0.0)
+        self.prefix = np.zeros((len(values), self.width + 1))
+        np.cumsum(self.values, axis=1, out=self.prefix[:, 1:])
+        self.mask = mask
+        self.sorted = {}
+
+    def count(self, rows, n=None):
+        lengths = self.lengths[rows]
+        return lengths if n is None else np.minimum(lengths, n)
+
+    def sum(self, rows, n=None):
+        start = self.width - self.count(rows, n)
+        return self.prefix[rows, self.width] - self.prefix[rows, start]
+
+    def mean(self, rows, n=None):
+        """Last n mean per row, NaN for rows without games."""
+        counts = self.count(rows, n)
+        result = np.full(len(counts), np.nan)
+        np.divide(self.sum(rows, n), counts, out=result, where=counts > 0)
+        return result
+
+    def sorted_window(self, n=None):
+        # The last n values of every row in ascending order, padding as -inf in
+        # front. Built once per window length and reused for every query.
+        if n not in self.sorted:
+            keep = self.mask.copy()
+            if n is not None:
+                keep &= np.arange(self.width) >= self.width - n
+            self.sorted[n] = np.sort(np.where(keep, self.values, -np.inf), axis=1)
+        return self.sorted[n]
+
+    def over(self, rows, lines, n=None):
+        """Number of each row's last n values strictly above the row's line. The
+        queries are grouped by row, so each distinct row costs one vectorized
+        binary search over its lines."""
+        rows = np.asarray(rows, dtype=int)
+        lines = np.asarray(lines, dtype=float)
+        window = self.sorted_window(n)
+        result = np.zeros(len(rows), dtype=int)
+        order = np.argsort(rows, kind="stable")
+        unique_rows, starts = np.unique(rows[order], return_index=True)
+        for row, group in zip(unique_rows, np.split(order, starts[1:])):
+            below = np.searchsorted(window[row], lines[group], side="right")
+            result[group] = self.width - below
+        return result